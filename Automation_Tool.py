@@ -1,11 +1,12 @@
 # Automation Tool.py - 顶部导入优化
 import sys
 import os
-import json
+import time
+import threading
 
 # 第一步：只导入绝对必要的模块
-from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton, QTextEdit, QGroupBox, QGridLayout, QHBoxLayout, QProgressBar, QMenu, QAction, QDialog, QMessageBox, QFileDialog, QLineEdit, QCheckBox, QFormLayout, QStyle, QScrollArea
+from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton, QTextEdit, QGroupBox, QGridLayout, QHBoxLayout, QProgressBar, QMenu, QAction, QDialog, QMessageBox, QFileDialog, QLineEdit, QCheckBox, QComboBox, QFormLayout, QStyle, QScrollArea, QTableView, QHeaderView, QAbstractItemView, QSplitter
 from PyQt5.QtGui import QFont, QIcon, QCursor
 from PyQt5.QtCore import pyqtSignal, QThread
 
@@ -15,40 +16,18 @@ current_script = Path(__file__).resolve()
 project_root = current_script.parent.parent
 sys.path.append(str(project_root))
 
-# 快捷方式配置管理
-def get_app_config_dir():
-    """获取应用配置目录"""
-    if getattr(sys, 'frozen', False):
-        # 如果是打包的exe，使用exe目录
-        app_data_dir = os.path.dirname(sys.executable)
-    else:
-        # 如果是开发模式，使用脚本目录
-        app_data_dir = os.path.dirname(os.path.abspath(__file__))
-    return app_data_dir
-
-def get_app_config_path():
-    """获取应用配置文件路径"""
-    config_dir = get_app_config_dir()
-    return os.path.join(config_dir, ".app_config.json")
-
+# 快捷方式配置管理（应用配置.app_config.json的读写见 modules/config.py，与Outlook连接方式等共用）
 def load_app_config():
     """加载应用配置"""
-    config_path = get_app_config_path()
-    try:
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"加载配置文件失败: {e}")
-    return {}
+    from modules import config
+    return config.load_app_config()
 
-def save_app_config(config):
+def save_app_config(app_config):
     """保存应用配置"""
-    config_path = get_app_config_path()
+    from modules import config
     try:
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
-    except Exception as e:
+        config.save_app_config(app_config)
+    except OSError as e:
         print(f"保存配置文件失败: {e}")
 
 def should_show_shortcut_dialog():
@@ -248,6 +227,10 @@ def get_find_excel_file():
     from utils.file_utils import find_excel_file
     return find_excel_file
 
+def get_datasource_cache():
+    from utils import datasource_cache
+    return datasource_cache
+
 # -------------------------- 启动窗口类 --------------------------
 class SplashScreen(QWidget):
     """启动屏幕 - 显示在加载主界面时"""
@@ -492,6 +475,49 @@ class ShortcutDialog(QDialog):
         """设置应用名称"""
         self.title_label.setText(name)
 
+# -------------------------- 搜索结果模型类 --------------------------
+class SearchResultModel(QAbstractTableModel):
+    """搜索结果表格模型：只保存行数据，由QTableView按可见区域绘制，可容纳大量结果"""
+    HEADERS = ["文件", "行号", "匹配行", "模式"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            value = self._rows[index.row()][index.column()]
+            return "" if value is None else str(value)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def append_rows(self, rows):
+        """批量追加结果行（每批只触发一次插入通知）"""
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def clear(self):
+        """清空所有结果"""
+        self.beginResetModel()
+        self._rows = []
+        self.endResetModel()
+
 # -------------------------- 文件搜索对话框类 --------------------------
 class FileSearchDialog(QDialog):
     def __init__(self, parent=None):
@@ -556,13 +582,39 @@ class FileSearchDialog(QDialog):
         self.case_sensitive_checkbox = QCheckBox("区分大小写")
         params_layout.addRow("", self.case_sensitive_checkbox)
 
+        # 内容索引选项（未变化的文件直接从索引读取）
+        self.use_index_checkbox = QCheckBox("使用内容索引（加速重复搜索）")
+        self.use_index_checkbox.setChecked(True)
+        params_layout.addRow("", self.use_index_checkbox)
+
+        # 多模式搜索选项（一次扫描同时搜索多个内容）
+        self.multi_pattern_checkbox = QCheckBox("多模式搜索（多个搜索内容用 ; 分隔）")
+        params_layout.addRow("", self.multi_pattern_checkbox)
+        self.regex_checkbox = QCheckBox("正则表达式")
+        params_layout.addRow("", self.regex_checkbox)
+
         params_group.setLayout(params_layout)
         layout.addWidget(params_group)
 
-        # 结果显示区域
+        # 结果显示区域：上方为匹配结果表格，下方为搜索日志
         results_group = QGroupBox("搜索结果")
         results_layout = QVBoxLayout()
 
+        self.result_model = SearchResultModel(self)
+        self.result_view = QTableView()
+        self.result_view.setModel(self.result_model)
+        self.result_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_view.setWordWrap(False)
+        # 固定行高，避免逐行计算尺寸
+        self.result_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.result_view.verticalHeader().setDefaultSectionSize(20)
+        self.result_view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.result_view.horizontalHeader().setStretchLastSection(True)
+        self.result_view.setColumnWidth(0, 320)
+        self.result_view.setColumnWidth(1, 50)
+        self.result_view.setColumnWidth(2, 260)
+
         self.result_text = QTextEdit()
         self.result_text.setReadOnly(True)
         self.result_text.setStyleSheet("""
@@ -574,7 +626,11 @@ class FileSearchDialog(QDialog):
                 font-size: 12px;
             }
         """)
-        results_layout.addWidget(self.result_text)
+        results_splitter = QSplitter(Qt.Vertical)
+        results_splitter.addWidget(self.result_view)
+        results_splitter.addWidget(self.result_text)
+        results_splitter.setSizes([400, 120])
+        results_layout.addWidget(results_splitter)
         results_group.setLayout(results_layout)
         layout.addWidget(results_group)
 
@@ -628,8 +684,22 @@ class FileSearchDialog(QDialog):
         if file_names_text:
             file_names = [name.strip() for name in file_names_text.split(',') if name.strip()]
 
+        # 多模式：拆分搜索内容并预先校验（正则写法错误时直接提示）
+        use_regex = self.regex_checkbox.isChecked()
+        if self.multi_pattern_checkbox.isChecked():
+            search_content = [part.strip() for part in search_content.split(';') if part.strip()]
+        if isinstance(search_content, list) or use_regex:
+            try:
+                from modules.search_core import MultiPatternMatcher
+                MultiPatternMatcher(search_content if isinstance(search_content, list) else [search_content],
+                                    self.case_sensitive_checkbox.isChecked(), use_regex)
+            except Exception as e:
+                QMessageBox.warning(self, "警告", f"搜索内容无效：{e}")
+                return
+        display_content = '; '.join(search_content) if isinstance(search_content, list) else search_content
+
         # 确认搜索
-        message = f"搜索目录：{search_dir}\n搜索内容：{search_content}\n搜索文件：{file_names or '常见配置文件'}"
+        message = f"搜索目录：{search_dir}\n搜索内容：{display_content}\n搜索文件：{file_names or '常见配置文件'}"
         reply = QMessageBox.question(
             self, "确认搜索", f"确认开始搜索？\n\n{message}",
             QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
@@ -641,17 +711,21 @@ class FileSearchDialog(QDialog):
         self.start_search_btn.setEnabled(False)
         self.cancel_search_btn.setEnabled(True)
         self.clear_results()
-        self.add_result(f"开始搜索内容: '{search_content}' (文件名: {file_names or 'config.kmg'})")
+        self.add_result(f"开始搜索内容: '{display_content}' (文件名: {file_names or 'config.kmg'})")
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
 
         # 创建搜索线程
         self.current_thread = FileSearchThread(
             search_dir, search_content, file_names,
-            self.case_sensitive_checkbox.isChecked()
+            self.case_sensitive_checkbox.isChecked(),
+            use_index=self.use_index_checkbox.isChecked(),
+            use_regex=use_regex
         )
         self.current_thread.result_signal.connect(self.add_result)
+        self.current_thread.results_batch_signal.connect(self.add_result_rows)
         self.current_thread.progress_signal.connect(self.update_progress)
+        self.current_thread.count_signal.connect(self.update_counts)
         self.current_thread.finished.connect(self.on_search_finished)
         self.current_thread.start()
 
@@ -663,22 +737,33 @@ class FileSearchDialog(QDialog):
         cursor.movePosition(cursor.End)
         self.result_text.setTextCursor(cursor)
 
+    def add_result_rows(self, rows):
+        """批量添加匹配结果到表格"""
+        self.result_model.append_rows(rows)
+        self.result_view.scrollToBottom()
+
     def clear_results(self):
         """清空结果区域"""
         self.result_text.clear()
+        self.result_model.clear()
 
     def update_progress(self, value):
         """更新进度条"""
         self.progress_bar.setValue(value)
 
+    def update_counts(self, discovered, scanned):
+        """在进度条上显示“已扫描/已发现”文件数"""
+        self.progress_bar.setFormat(f"已扫描 {scanned} / 已发现 {discovered} 个文件 (%p%)")
+
     def on_search_finished(self, success):
         """搜索完成回调"""
         self.progress_bar.setVisible(False)
+        self.progress_bar.setFormat("%p%")
         self.start_search_btn.setEnabled(True)
         self.cancel_search_btn.setEnabled(False)
         if success:
             self.add_result("\n" + "="*50)
-            self.add_result("搜索完成！")
+            self.add_result(f"搜索完成！结果表格共 {self.result_model.rowCount()} 行")
         else:
             self.add_result("\n" + "="*50)
             self.add_result("搜索过程中出现错误！")
@@ -704,16 +789,34 @@ class FileSearchDialog(QDialog):
 
 # -------------------------- 文件搜索线程类 --------------------------
 class FileSearchThread(QThread):
+    """文件搜索线程：在后台运行搜索引擎（modules.search_engine），把结果批量转发到界面"""
     result_signal = pyqtSignal(str)
+    results_batch_signal = pyqtSignal(list)  # 批量匹配结果 [(文件, 行号, 匹配行, 模式)]
     progress_signal = pyqtSignal(int)
+    count_signal = pyqtSignal(int, int)  # (已发现文件数, 已扫描文件数)
     finished = pyqtSignal(bool)
 
-    def __init__(self, root_dir, search_content, file_names=None, case_sensitive=False):
+    BATCH_INTERVAL = 0.1  # 结果批量发送间隔（秒），避免逐条刷新界面
+
+    def __init__(self, root_dir, search_content, file_names=None, case_sensitive=False, max_workers=8, use_index=True,
+                 use_regex=False):
+        """
+        :param search_content: 搜索内容；传入列表时进入多模式搜索，一次扫描报告每个文件命中的所有模式
+        :param use_regex: 是否把搜索内容作为正则表达式（总是使用多模式匹配器）
+        """
         super().__init__()
         self.root_dir = root_dir
         self.search_content = search_content
+        self.use_regex = use_regex
         self.file_names = file_names
         self.case_sensitive = case_sensitive
+        self.max_workers = max(1, max_workers)
+        self.use_index = use_index
+        self.search = None
+        self._pending_rows = []
+        self._pending_messages = []
+        self._pending_counts = None  # 最近一次的 (已发现, 已扫描, 遍历是否结束)，随结果一起按间隔发送
+        self._last_flush = 0.0
         self.is_canceled = False
 
     def run(self):
@@ -724,98 +827,96 @@ class FileSearchThread(QThread):
             self.result_signal.emit(f"搜索过程中出错: {str(e)}")
             self.finished.emit(False)
 
-    def search_files(self):
-        """执行文件搜索"""
-        found_files = []
-        total_files = 0
-        processed_files = 0
-
-        # 1. 如果没有指定文件名，默认搜索常见配置文件
-        if self.file_names is None:
-            self.file_names = ['config.kmg']
-
-        # 2. 统计总文件数
-        self.result_signal.emit("正在扫描文件...")
-        for root, _, files in os.walk(self.root_dir):
-            if self.is_canceled:
-                self.result_signal.emit("搜索已取消")
-                return
-            for file in files:
-                if any(file.lower() == name.lower() for name in self.file_names):
-                    total_files += 1
-
-        if total_files == 0:
-            self.result_signal.emit(f"在指定目录中未找到目标文件类型: {', '.join(self.file_names)}")
+    def _flush_results(self, force=False):
+        """按固定间隔把缓冲的结果、计数和进度合并为一次发送到界面"""
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.BATCH_INTERVAL:
             return
+        self._last_flush = now
+        if self._pending_rows:
+            rows, self._pending_rows = self._pending_rows, []
+            self.results_batch_signal.emit(rows)
+        if self._pending_messages:
+            messages, self._pending_messages = self._pending_messages, []
+            self.result_signal.emit("\n".join(messages))
+        if self._pending_counts is not None:
+            counts, self._pending_counts = self._pending_counts, None
+            self._emit_counts(*counts)
+
+    def _emit_counts(self, discovered, scanned, walk_finished):
+        """根据“已发现/已扫描”计数更新进度（遍历未结束时进度不超过99%）"""
+        self.count_signal.emit(discovered, scanned)
+        if discovered:
+            progress = int((scanned / discovered) * 100)
+            self.progress_signal.emit(progress if walk_finished else min(progress, 99))
 
-        self.result_signal.emit(f"找到 {total_files} 个目标文件，开始搜索内容...")
-
-        # 3. 开始搜索
-        for root, _, files in os.walk(self.root_dir):
-            for file in files:
-                if self.is_canceled:
-                    self.result_signal.emit("搜索已取消")
-                    return
-
-                file_lower = file.lower()
-                # 检查文件名是否匹配（不区分大小写）
-                if any(file_lower == name.lower() for name in self.file_names):
-                    file_path = os.path.join(root, file)
-                    processed_files += 1
+    def search_files(self):
+        """执行文件搜索：单次遍历目录，同时把目标文件交给有界线程池扫描内容"""
+        from modules.search_engine import FileContentSearch
+        self.search = FileContentSearch(
+            self.root_dir, self.search_content,
+            file_names=self.file_names,
+            case_sensitive=self.case_sensitive,
+            use_regex=self.use_regex,
+            workers=self.max_workers,
+            use_index=self.use_index,
+        )
+        if self.is_canceled:
+            self.search.cancel()
+        if self.search.multi_matcher is not None:
+            self.result_signal.emit(f"多模式搜索：共 {len(self.search.multi_matcher.patterns)} 个模式")
+
+        # 边遍历边搜索（不再预先统计总文件数）
+        self.result_signal.emit("正在扫描文件并搜索内容...")
+        pattern_files = {}
+        for event in self.search.iter_results():
+            if event["type"] == "match":
+                pattern = event["pattern"] if self.search.multi_matcher is not None else None
+                self._pending_rows.append((event["path"], event["line"], event["text"], pattern))
+                if pattern is not None:
+                    pattern_files[pattern] = pattern_files.get(pattern, 0) + 1
+            elif event["type"] == "error":
+                self._pending_messages.append(f"\n 读取文件 {event['path']} 时出错: {event['message']}")
+            else:
+                # 进度事件（含遍历心跳）：只记录最新计数，由_flush_results按间隔发送
+                self._pending_counts = (event["discovered"], event["scanned"], False)
+            self._flush_results()
+        self._flush_results(force=True)
+
+        search = self.search
+        if search.index_error:
+            self.result_signal.emit(f"内容索引不可用，已直接读取文件: {search.index_error}")
+        if search.is_canceled:
+            self.result_signal.emit("搜索已取消")
+            return
 
-                    # 更新进度
-                    progress = int((processed_files / total_files) * 100)
-                    self.progress_signal.emit(progress)
+        if search.discovered == 0:
+            self.result_signal.emit(f"在指定目录中未找到目标文件类型: {', '.join(search.file_names)}")
+            return
 
-                    try:
-                        # 尝试多种编码读取文件
-                        encodings = ['utf-8', 'gb18030', 'gbk', 'latin-1']
-                        content_found = False
-
-                        for encoding in encodings:
-                            if self.is_canceled:
-                                self.result_signal.emit("搜索已取消")
-                                return
-
-                            try:
-                                with open(file_path, 'r', encoding=encoding) as f:
-                                    for line_num, line in enumerate(f, 1):
-                                        if self.is_canceled:
-                                            self.result_signal.emit("搜索已取消")
-                                            return
-
-                                        line_to_check = line if self.case_sensitive else line.lower()
-                                        search_to_check = self.search_content if self.case_sensitive else self.search_content.lower()
-
-                                        if search_to_check in line_to_check:
-                                            # 找到匹配内容
-                                            self.result_signal.emit(f"\n 找到匹配文件: {file_path}")
-                                            self.result_signal.emit(f"   行号: {line_num}, 匹配行: {line.strip()}")
-                                            found_files.append((file_path, line_num, line.strip()))
-                                            content_found = True
-                                            break  # 找到后跳出编码循环
-                                if content_found:
-                                    break
-                            except UnicodeDecodeError:
-                                continue  # 尝试下一种编码
-                            except Exception as e:
-                                self.result_signal.emit(f"\n 读取文件 {file_path} 时出错: {e}")
-                                break
-
-                    except Exception as e:
-                        self.result_signal.emit(f"\n访问文件 {file_path} 时发生错误: {e}")
-
-        # 4. 完成搜索
+        # 完成搜索
+        self._emit_counts(search.discovered, search.scanned, True)
         self.progress_signal.emit(100)
         self.result_signal.emit("\n" + "="*50)
-        if found_files:
-            self.result_signal.emit(f"搜索完成! 共找到 {len(found_files)} 个匹配项。")
+        self.result_signal.emit(f"共扫描 {search.scanned} 个目标文件")
+        if search.use_index:
+            self.result_signal.emit(f"内容索引：命中 {search.index_hits} 个，重新读取 {search.index_misses} 个")
+        if search.match_count:
+            self.result_signal.emit(f"搜索完成! 共找到 {search.match_count} 个匹配项。")
+            if search.multi_matcher is not None:
+                for pattern in search.multi_matcher.patterns:
+                    self.result_signal.emit(f"   模式 '{pattern}': {pattern_files.get(pattern, 0)} 个文件")
         else:
-            self.result_signal.emit(f"搜索完成! 未找到包含 '{self.search_content}' 的文件。")
+            content = self.search_content
+            if isinstance(content, list):
+                content = '; '.join(content)
+            self.result_signal.emit(f"搜索完成! 未找到包含 '{content}' 的文件。")
 
     def cancel(self):
         """取消搜索"""
         self.is_canceled = True
+        if self.search is not None:
+            self.search.cancel()
 
 # -------------------------- 线程类 --------------------------
 class FolderThread(QThread):
@@ -863,10 +964,14 @@ class MemoThread(QThread):
     progress = pyqtSignal(str)
     finished = pyqtSignal(bool, str, list)
 
-    def __init__(self, excel_path=None):
+    def __init__(self, excel_path=None, workers=None, output_mode="files", dry_run=False):
         super().__init__()
         self.excel_path = excel_path
+        self.dry_run = dry_run  # 只做预检查，报告将要生成的文件，不写入磁盘
+        self.workers = workers  # 并行生成的线程数（None使用默认值，1为逐行生成）
+        self.output_mode = output_mode  # files / merged / zip（见memo_generator.OUTPUT_MODES）
         self.is_canceled = False
+        self.cancel_event = threading.Event()  # 传给generate_memo，取消后停止生成
 
     def run(self):
         try:
@@ -876,7 +981,11 @@ class MemoThread(QThread):
             success, msg, generated_files = generate_memo(
                 excel_path=self.excel_path,
                 output_folder=None,  # 使用默认文件夹
-                progress_callback=lambda log: self.progress.emit(log)
+                progress_callback=lambda log: self.progress.emit(log),
+                workers=self.workers,
+                cancel_event=self.cancel_event,
+                output_mode=self.output_mode,
+                dry_run=self.dry_run
             )
             self.finished.emit(success, msg, generated_files)
         except Exception as e:
@@ -886,6 +995,7 @@ class MemoThread(QThread):
 
     def cancel(self):
         self.is_canceled = True
+        self.cancel_event.set()
         self.progress.emit("⏹️  正在取消MEMO生成任务...")
 
 class PdfExtractThread(QThread):
@@ -893,17 +1003,18 @@ class PdfExtractThread(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal(bool)
 
-    def __init__(self, input_dir, output_dir):
+    def __init__(self, input_dir, output_dir, max_workers=None):
         super().__init__()
         self.input_dir = input_dir
         self.output_dir = output_dir
+        self.max_workers = max_workers  # 并行提取的进程数（None使用默认值，1为逐个提取）
         self.extractor = None
 
     def run(self):
         try:
             # 延迟导入PdfTableExtractor
             PdfTableExtractor = get_pdf_extractor()
-            self.extractor = PdfTableExtractor()
+            self.extractor = PdfTableExtractor(max_workers=self.max_workers)
             self.extractor.log_signal.connect(self.log)
             self.extractor.progress_signal.connect(self.progress)
             self.extractor.finished_signal.connect(self.finished)
@@ -1496,6 +1607,24 @@ class MainWindow(QMainWindow):
         button_grid.addWidget(self.cancel_btn, 2, 1)
 
         button_layout.addLayout(button_grid)
+
+        # MEMO输出方式（见memo_generator.OUTPUT_MODES）
+        memo_options_layout = QHBoxLayout()
+        memo_mode_label = QLabel('MEMO输出方式：')
+        memo_mode_label.setFont(QFont("-apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto", 9))
+        memo_options_layout.addWidget(memo_mode_label)
+        self.memo_output_combo = QComboBox()
+        self.memo_output_combo.setFont(QFont("-apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto", 9))
+        self.memo_output_combo.addItem('每份MEMO一个文件', "files")
+        self.memo_output_combo.addItem('合并为一个文档（每份一页）', "merged")
+        self.memo_output_combo.addItem('打包为一个压缩包', "zip")
+        memo_options_layout.addWidget(self.memo_output_combo)
+        # 预检查：只校验模板和Excel数据并在日志中列出将要生成的文件，不写入磁盘
+        self.memo_dry_run_checkbox = QCheckBox('只预检查（不生成文件）')
+        self.memo_dry_run_checkbox.setFont(QFont("-apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto", 9))
+        memo_options_layout.addWidget(self.memo_dry_run_checkbox)
+        memo_options_layout.addStretch()
+        button_layout.addLayout(memo_options_layout)
         button_group.setLayout(button_layout)
         self.layout.addWidget(button_group)
 
@@ -1710,7 +1839,7 @@ class MainWindow(QMainWindow):
             self.update_log('已完成初始化')
 
     def refresh_excel_data(self):
-        """重新读取Excel文件，刷新数据"""
+        """刷新Excel数据：重新查找文件并检查共享缓存（只比较文件大小和修改时间，不打开工作簿）"""
         self.update_log("正在刷新Excel数据...")
         try:
             # 延迟导入find_excel_file
@@ -1723,7 +1852,10 @@ class MainWindow(QMainWindow):
             self.memo_btn.setEnabled(excel_exists)
 
             if excel_exists:
-                self.update_log(" Excel数据已刷新（修改内容已生效）")
+                if get_datasource_cache().revalidate(self.excel_path):
+                    self.update_log(" Excel文件未修改，继续使用已读取的数据")
+                else:
+                    self.update_log(" Excel数据已刷新（修改内容将在下次使用时读取）")
             else:
                 self.update_log(" 未找到Excel文件，刷新失败")
         except Exception as e:
@@ -1963,9 +2095,12 @@ class MainWindow(QMainWindow):
 
         self._prepare_task(disable_all_buttons=False)
         self.memo_btn.setEnabled(False)  # Only disable the specific button
-        self.update_log("开始生成MEMO...")
+        dry_run = self.memo_dry_run_checkbox.isChecked()
+        self.update_log("开始预检查MEMO..." if dry_run else "开始生成MEMO...")
 
-        self.memo_thread = MemoThread(excel_path=self.excel_path)
+        self.memo_thread = MemoThread(excel_path=self.excel_path,
+                                      output_mode=self.memo_output_combo.currentData(),
+                                      dry_run=dry_run)
         self.current_thread = self.memo_thread  # Keep reference for cancel functionality
         self.memo_thread.progress.connect(self.update_log)
         self.memo_thread.finished.connect(self.on_memo_finished)
@@ -1975,7 +2110,10 @@ class MainWindow(QMainWindow):
         self._reset_task_state()
         self.update_log(f"\n{msg}")
         self.statusBar().showMessage(msg)
-        if success:
+        if success and self.memo_thread is not None and self.memo_thread.dry_run:
+            # 预检查不生成文件：计划生成的文件已逐行列在日志中
+            QMessageBox.information(self, "预检查完成", f"{msg}\n\n将要生成的文件已列在操作日志中")
+        elif success:
             if generated_files:
                 # Create a custom dialog showing all generated files
                 dialog = QDialog(self)
@@ -1990,7 +2128,14 @@ class MainWindow(QMainWindow):
                 icon_label.setPixmap(QApplication.style().standardIcon(QStyle.SP_MessageBoxInformation).pixmap(32, 32))
                 layout.addWidget(icon_label, alignment=Qt.AlignCenter)
 
-                title_label = QLabel(f"MEMO生成成功！共生成 {len(generated_files)} 个文件")
+                from modules.memo_generator import split_generated_entry
+                entries = [split_generated_entry(item) for item in generated_files]
+                if entries[0][1] is None:
+                    title_text = f"MEMO生成成功！共生成 {len(generated_files)} 个文件"
+                else:
+                    # 合并文档/压缩包：所有MEMO写入同一个文件
+                    title_text = f"MEMO生成成功！共 {len(generated_files)} 份，已写入 {os.path.basename(entries[0][0])}"
+                title_label = QLabel(title_text)
                 title_label.setFont(QFont("Arial", 12, QFont.Bold))
                 layout.addWidget(title_label, alignment=Qt.AlignCenter)
 
@@ -2006,11 +2151,13 @@ class MainWindow(QMainWindow):
                 scroll_widget = QWidget()
                 scroll_layout = QVBoxLayout(scroll_widget)
 
-                for file_path in generated_files:
+                for file_path, entry in entries:
+                    # 合并文档/压缩包模式下每项为“文件路径::条目说明”，链接指向合并后的文件
                     if os.path.exists(file_path):
                         # Clickable file link
                         file_path_forward = file_path.replace("\\", "/")
-                        file_label = QLabel(f'<a href="file:///{file_path_forward}" style="color: #3498DB; text-decoration: underline;">{os.path.basename(file_path)}</a>')
+                        display_name = f"{os.path.basename(file_path)} - {entry}" if entry else os.path.basename(file_path)
+                        file_label = QLabel(f'<a href="file:///{file_path_forward}" style="color: #3498DB; text-decoration: underline;">{display_name}</a>')
                         file_label.setOpenExternalLinks(True)
                         file_label.setCursor(QCursor(Qt.PointingHandCursor))
                         scroll_layout.addWidget(file_label)
@@ -2111,6 +2258,10 @@ class MainWindow(QMainWindow):
 if __name__ == "__main__":
     import sys
     import time
+    import multiprocessing
+
+    # 打包为exe后，PDF并行提取的子进程会重新启动本程序，需要先交给multiprocessing处理
+    multiprocessing.freeze_support()
 
     # 记录启动时间
     start_time = time.perf_counter()
@@ -0,0 +1,173 @@
+# modules/address_parser.py
+"""
+地址解析器
+从“地址 姓名 电话”格式的单元格文本中拆出地址、姓名和电话（电话为末尾10-11位数字）。
+
+解析结果与原来依次尝试三个正则（精确地址格式 → 含数字的地址 → 宽松格式）完全一致，但改为从右向左定位：
+    1. 先从末尾取电话（最后一个空格之后的10-11位数字），不符合时直接返回空结果；
+    2. 姓名不含数字，因此地址的结尾只能是最后一个数字（或其后紧跟的“号/楼”），候选地址唯一；
+    3. 只对这一个候选地址做一次预编译的整串匹配，宽松格式则直接按位置切分。
+不再对整串做带回溯的惰性匹配，长单元格的解析时间与长度成线性关系。
+
+直接运行本文件执行微基准测试，并用随机文本与原解析逻辑逐条对比：python modules/address_parser.py
+"""
+import re
+from typing import Dict, Iterable, List
+
+# 地址允许的字符（与原精确/次精确模式相同）
+_ADDRESS_CHARS = r'[\u4e00-\u9fa50-9a-zA-Z\s\-\.号楼路街巷区镇省市县]'
+# 精确模式：路/街/巷/道 + 门牌号（可带“号”或“楼”）
+_PRECISE_ADDRESS = re.compile(_ADDRESS_CHARS + r'+[路街巷道]\s*\d+[号楼]?')
+# 次精确模式：以数字结尾的地址
+_NUMBERED_ADDRESS = re.compile(_ADDRESS_CHARS + r'+\d+')
+# 最后一个数字（其后只有非数字字符）
+_LAST_DIGIT = re.compile(r'\d\D*$')
+_WHITESPACE = re.compile(r'\s+')
+
+EMPTY_RESULT = {"address": "", "name": "", "phone": ""}
+
+
+def _split_phone(content):
+    """从右侧取电话：最后一个空格之后为10-11位数字时返回 (电话之前的文本, 电话)，否则返回None"""
+    head, separator, phone = content.rpartition(' ')
+    if separator and 10 <= len(phone) <= 11 and phone.isdecimal():
+        return head, phone
+    return None
+
+
+class AddressParser:
+    """地址解析器（正则在模块加载时编译一次）"""
+
+    @staticmethod
+    def parse_address_info(content: str) -> Dict[str, str]:
+        """
+        解析地址、姓名、电话信息
+
+        Args:
+            content: 包含地址、姓名、电话的文本
+
+        Returns:
+            Dict: 解析结果，包含address、name、phone字段
+        """
+        if not content:
+            return dict(EMPTY_RESULT)
+
+        # 清理文本：换行及连续空白合并为一个空格
+        content = _WHITESPACE.sub(' ', content.replace('\n', ' ').strip())
+
+        split = _split_phone(content)
+        if split is None:
+            return dict(EMPTY_RESULT)
+        head, phone = split
+
+        # 姓名不含数字：精确/次精确模式下地址必须在最后一个数字（或其后的“号/楼”）处结束
+        last_digit = _LAST_DIGIT.search(head)
+        end = last_digit.start() if last_digit else -1
+        if end >= 0:
+            after = head[end + 1:end + 2]
+            if after == ' ':
+                address, name = head[:end + 1], head[end + 2:]
+            elif after in ('号', '楼') and head[end + 2:end + 3] == ' ':
+                address, name = head[:end + 2], head[end + 3:]
+            else:
+                address = name = ""
+            if name and (_PRECISE_ADDRESS.fullmatch(address) or
+                         (address[-1].isdecimal() and _NUMBERED_ADDRESS.fullmatch(address))):
+                return {"address": address.strip(), "name": name.strip(), "phone": phone}
+
+        # 宽松模式：地址取到最后一个数字之后的第一个空格为止，其余为姓名
+        split_at = head.find(' ', end + 1)
+        if split_at != -1 and head[split_at + 1:]:
+            return {"address": head[:split_at].strip(), "name": head[split_at + 1:].strip(), "phone": phone}
+
+        # 如果没有匹配到任何模式，返回空值
+        return dict(EMPTY_RESULT)
+
+    @classmethod
+    def parse_many(cls, contents: Iterable) -> List[Dict[str, str]]:
+        """
+        批量解析一整列（空单元格解析为空结果，非文本单元格先转换为文本；相同文本只解析一次）
+        """
+        parsed = {}
+        results = []
+        for content in contents:
+            text = "" if content is None else str(content)
+            result = parsed.get(text)
+            if result is None:
+                result = parsed[text] = cls.parse_address_info(text)
+            results.append(dict(result))
+        return results
+
+
+# 微基准测试与一致性校验（直接运行该脚本时执行）
+if __name__ == "__main__":
+    import random
+    import time
+
+    _LEGACY_PATTERNS = [
+        r'([\u4e00-\u9fa50-9a-zA-Z\s\-\.号楼路街巷区镇省市县]+?[路街巷道]\s*\d+[号号楼]?)\s+([^\d]+?)\s+(\d{10,11})$',
+        r'([\u4e00-\u9fa50-9a-zA-Z\s\-\.号楼路街巷区镇省市县]+?\d+)\s+([^\d]+?)\s+(\d{10,11})$',
+        r'(.*?)\s+([^\d]+?)\s+(\d{10,11})$',
+    ]
+
+    def legacy_parse(content):
+        """原解析逻辑（每次调用依次用字符串模式匹配三个正则）"""
+        if not content:
+            return {"address": "", "name": "", "phone": ""}
+        content = content.replace('\n', ' ').strip()
+        content = re.sub(r'\s+', ' ', content)
+        for pattern in _LEGACY_PATTERNS:
+            match = re.match(pattern, content)
+            if match:
+                return {"address": match.group(1).strip(), "name": match.group(2).strip(), "phone": match.group(3).strip()}
+        return {"address": "", "name": "", "phone": ""}
+
+    random.seed(20240601)
+    cities = ["上海市浦东新区", "北京市朝阳区", "江苏省苏州市工业园区", "广东省深圳市南山区", "浙江省杭州市余杭区", "四川省成都市高新区"]
+    roads = ["张江路", "建国路", "星湖街", "科技南十二路", "文一西路", "天府大道", "金桥镇金穗巷"]
+    names = ["张三", "李四 经理", "王工", "Zhao Lei", "陈女士", "刘先生/采购部"]
+
+    def realistic():
+        """常见单元格：省市区 + 道路门牌 + 楼栋房间 + 联系人 + 手机/座机"""
+        address = random.choice(cities) + random.choice(roads) + f"{random.randint(1, 2999)}" + random.choice(["号", "号楼", "", "弄"])
+        if random.random() < 0.5:
+            address += random.choice([" ", ""]) + f"{random.randint(1, 30)}栋{random.randint(101, 2808)}室"
+        phone = random.choice(["13", "15", "18", "021", "0512"]) + "".join(random.choice("0123456789") for _ in range(9))
+        phone = phone[:random.choice([10, 11])]
+        separator = random.choice([" ", "  ", "\n", " \n "])
+        return f"{address}{separator}{random.choice(names)}{random.choice([' ', '  ', chr(10)])}{phone}"
+
+    def noisy():
+        """随机组合的文本（覆盖数字、空白、号/楼、标点、全角数字等边界情况）"""
+        alphabet = ["上", "海", "路", "街", "道", "号", "楼", "区", " ", " ", "\n", "1", "2", "9", "0", "-", ".", "a", "Z", "/", "（", "１", "@"]
+        text = "".join(random.choice(alphabet) for _ in range(random.randint(0, 30)))
+        if random.random() < 0.7:
+            text += " " + "".join(random.choice("0123456789") for _ in range(random.choice([9, 10, 11, 12])))
+        return text
+
+    # 长单元格：大量空格分隔的片段且末尾不是电话（原宽松模式需要大量回溯）
+    long_cells = [" ".join(f"{random.choice(cities)}{random.randint(1, 99)}号 备注" for _ in range(60)) + " 待补充" for _ in range(50)]
+
+    samples = [realistic() for _ in range(20000)] + [noisy() for _ in range(50000)] + long_cells
+    mismatches = [s for s in samples if legacy_parse(s) != AddressParser.parse_address_info(s)]
+    print(f"一致性校验：{len(samples)}条，不一致{len(mismatches)}条")
+    for sample in mismatches[:5]:
+        print(repr(sample), legacy_parse(sample), AddressParser.parse_address_info(sample))
+
+    def bench(label, func, data, repeat=3):
+        best = min(_timed(func, data) for _ in range(repeat))
+        print(f"{label}: {len(data)}条 {best * 1000:.1f}ms（{best / len(data) * 1e6:.2f}µs/条）")
+        return best
+
+    def _timed(func, data):
+        start = time.perf_counter()
+        func(data)
+        return time.perf_counter() - start
+
+    realistic_cells = samples[:20000]
+    old = bench("原解析 常见地址", lambda data: [legacy_parse(s) for s in data], realistic_cells)
+    new = bench("新解析 常见地址", lambda data: [AddressParser.parse_address_info(s) for s in data], realistic_cells)
+    bench("新解析 parse_many", AddressParser.parse_many, realistic_cells)
+    old_long = bench("原解析 长单元格", lambda data: [legacy_parse(s) for s in data], long_cells, repeat=1)
+    new_long = bench("新解析 长单元格", lambda data: [AddressParser.parse_address_info(s) for s in data], long_cells)
+    print(f"加速：常见地址 {old / new:.1f}倍，长单元格 {old_long / new_long:.0f}倍")
@@ -1,14 +1,65 @@
 # modules/config.py
 # 硬编码所有默认路径，避免在启动时导入其他模块
+import json
 import os
+import sys
+from types import SimpleNamespace
+
+# 应用目录（与.app_config.json同目录：打包exe所在目录，开发模式为项目根目录）
+if getattr(sys, 'frozen', False):
+    APP_DIR = os.path.dirname(sys.executable)
+else:
+    APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 应用配置文件（与主程序的快捷方式设置等共用）
+APP_CONFIG_PATH = os.path.join(APP_DIR, ".app_config.json")
+
+
+def load_app_config(config_path=None):
+    """读取应用配置，文件不存在或已损坏时返回空字典"""
+    try:
+        with open(config_path or APP_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return config if isinstance(config, dict) else {}
+
+
+def save_app_config(config, config_path=None):
+    """写入应用配置（先写临时文件再替换，避免中途中断留下损坏的配置），写入失败时抛出OSError"""
+    config_path = config_path or APP_CONFIG_PATH
+    tmp_path = config_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, config_path)
+
 # PDF相关路径
 PDF_INPUT_DIR = r"H:\Shanghai\IMT\Service\Management Tools\量具\标准器校准证书最新\02步距规"
 PDF_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "Desktop", "tool")
+# 自定义PDF提取配置（其他证书版式），见 modules/pdf_profiles.py
+PDF_PROFILES_PATH = os.path.join(APP_DIR, "pdf_profiles.json")
 
 # 其他配置
 DEFAULT_SEARCH_DIR = r"C:\Zeiss\CMM_Tools\FW_C99\backup"
 DEFAULT_SEARCH_CONTENT = "Install_version = V47.04"
 DEFAULT_FILE_NAMES = "config.kmg"
+# 文件内容索引（SQLite），重复搜索时只重新读取有变化的文件
+SEARCH_INDEX_PATH = os.path.join(APP_DIR, ".search_index.db")
+
+# 邮件后端（见 modules/mail_backends.py）：outlook 通过COM调用本机Outlook；eml 写入.eml文件；smtp 发送到本地SMTP替身服务器
+MAIL_BACKEND = "outlook"
+MAIL_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "Desktop", "tool", "mail_out")
+MAIL_SMTP_HOST = "localhost"
+MAIL_SMTP_PORT = 1025
+# 邮件处理方式：display 逐封打开邮件窗口；drafts 直接保存到草稿箱（或 MAIL_DRAFT_FOLDER 指定的文件夹，如 "草稿/包装箱回收"），不打开窗口
+MAIL_DELIVERY = "display"
+MAIL_DRAFT_FOLDER = ""
+MAIL_REVIEW_COUNT = 0  # drafts模式下保存完成后打开前N封供检查
+# 邮件模板：内置“包装箱回收”模板，可在tool文件夹的email_templates.json中添加（见 modules/email_templates.py）
+EMAIL_TEMPLATES_PATH = os.path.join(os.path.expanduser("~"), "Desktop", "tool", "email_templates.json")
+MAIL_TEMPLATE = "包装箱回收"
+# Outlook签名缓存：签名文件未变化时直接使用（见 modules/signature_cache.py）
+SIGNATURE_CACHE_PATH = os.path.join(APP_DIR, ".signature_cache.json")
 
 # Excel相关
 EXCEL_SEARCH_PATHS = [
@@ -16,3 +67,15 @@ EXCEL_SEARCH_PATHS = [
     os.path.join(os.path.expanduser("~/Desktop"), "tool", "*.xls"),
     os.path.join(os.path.expanduser("~/Desktop"), "tool", "*.xlsx"),
 ]
+
+# ExcelManager读取的数据（见 modules/excel_manager.py）
+# excel_data_mapping 的值为单元格（如 "C1"）时从该单元格开始读取，为列（如 "C"）时从第1行开始读取；
+# company_name 取“/”后的最后一段，address_info 解析为地址、姓名和电话，其余字段原样返回
+EXCEL_CONFIG = SimpleNamespace(
+    default_excel_path=os.path.join(os.path.expanduser("~"), "Desktop", "tool", "datasource.xlsx"),
+    sheet_name=None,  # None 为活动工作表
+    excel_data_mapping={
+        "company_name": "C1",
+        "address_info": "N1",
+    },
+)
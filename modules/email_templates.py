@@ -0,0 +1,200 @@
+# modules/email_templates.py
+"""
+邮件模板
+每种邮件由主题、纯文本正文、HTML外壳和字段定义组成。模板编译一次：
+HTML外壳与签名预先拼接并在正文位置切分为前后两段，每行只需填充主题和正文、转义后拼接。
+
+除内置的“包装箱回收”模板外，可在tool文件夹的 email_templates.json 中添加或覆盖模板，无需修改代码：
+
+    [
+        {
+            "name": "校准提醒",
+            "subject": "${company} ${model} SN:${sn}校准提醒",
+            "body": "您好：\\n\\n贵司设备 ${model}（SN: ${sn}）即将到期，请安排校准。\\n",
+            "html_shell_file": "email_shell.html",
+            "fields": {
+                "company": {"column": 2, "split": "/"},
+                "model": {"column": 4},
+                "sn": {"column": 1}
+            }
+        }
+    ]
+
+占位符使用 ${字段名}；fields 中 column 为Sheet1的列序号（从0开始，空单元格为空字符串），split 取分隔符后的最后一段，
+strip 去除首尾空白，collapse_whitespace 把连续空白合并为一个空格。
+HTML外壳（html_shell 或 tool文件夹中的 html_shell_file）必须包含 ${body}，可包含 ${signature}；
+单元格内容在写入HTML前会被转义，地址中的“<”等字符不会破坏邮件格式。
+"""
+import html
+import json
+import os
+from string import Template
+
+from .config import EMAIL_TEMPLATES_PATH
+
+DEFAULT_TEMPLATE_NAME = "包装箱回收"
+
+DEFAULT_HTML_SHELL = """
+<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=utf-8">
+<style>
+    body { font-family: 'Calibri', sans-serif; font-size: 11pt; }
+    pre { font-family: 'Calibri', sans-serif; font-size: 11pt; }
+</style>
+</head>
+<body>
+<pre>${body}</pre>
+<br>
+${signature}
+</body>
+</html>
+"""
+
+# 内置模板：包装箱回收（公司：F列索引2取“/”后的部分；型号：H列索引4；SN：B列索引1；地址及联系人：N列索引13）
+DEFAULT_TEMPLATE = {
+    "name": DEFAULT_TEMPLATE_NAME,
+    "subject": "${company} ${model} SN:${sn}包装箱回收",
+    "body": (
+        "Dear Mr. Zhang:\n"
+        "\n"
+        "如下客户请回收包装箱，麻烦尽快安排：\n"
+        "客户：${company}\n"
+        "CMM: ${model} SN: ${sn}\n"
+        "地址及联系人：${contact}\n"
+        "谢谢！\n"
+        "\n"
+    ),
+    "html_shell": DEFAULT_HTML_SHELL,
+    "html_shell_file": None,
+    "fields": {
+        "company": {"column": 2, "split": "/"},
+        "model": {"column": 4},
+        "sn": {"column": 1},
+        "contact": {"column": 13, "collapse_whitespace": True},
+    },
+}
+
+TEMPLATE_KEYS = set(DEFAULT_TEMPLATE)
+FIELD_KEYS = {"column", "split", "strip", "collapse_whitespace"}
+
+
+def _placeholders(text):
+    """模板文本中的占位符名称"""
+    names = set()
+    for match in Template.pattern.finditer(text):
+        name = match.group("named") or match.group("braced")
+        if name:
+            names.add(name)
+    return names
+
+
+def _normalize(template, base_dir):
+    """补全缺省字段并校验模板"""
+    name = template.get("name", "?")
+    unknown = set(template) - TEMPLATE_KEYS
+    if unknown:
+        raise ValueError(f"邮件模板 {name} 含未知字段：{', '.join(sorted(unknown))}")
+    normalized = dict(DEFAULT_TEMPLATE, **template)
+    if template.get("html_shell_file"):
+        shell_path = os.path.join(base_dir, template["html_shell_file"])
+        with open(shell_path, "r", encoding="utf-8") as f:
+            normalized["html_shell"] = f.read()
+
+    for field_name, spec in normalized["fields"].items():
+        unknown = set(spec) - FIELD_KEYS
+        if unknown:
+            raise ValueError(f"邮件模板 {name} 的字段 {field_name} 含未知参数：{', '.join(sorted(unknown))}")
+        if not isinstance(spec.get("column"), int) or spec["column"] < 0:
+            raise ValueError(f"邮件模板 {name} 的字段 {field_name} 的column必须是非负整数")
+
+    undefined = (_placeholders(normalized["subject"]) | _placeholders(normalized["body"])) - set(normalized["fields"])
+    if undefined:
+        raise ValueError(f"邮件模板 {name} 使用了未定义的字段：{', '.join(sorted(undefined))}")
+    if "body" not in _placeholders(normalized["html_shell"]):
+        raise ValueError(f"邮件模板 {name} 的HTML外壳缺少 ${{body}}")
+    return normalized
+
+
+def load_templates(path=None):
+    """
+    加载邮件模板：内置模板在前，email_templates.json 中的同名模板覆盖内置模板
+    :return: {模板名称: 模板字典}
+    """
+    path = path or EMAIL_TEMPLATES_PATH
+    templates = {DEFAULT_TEMPLATE_NAME: _normalize(DEFAULT_TEMPLATE, "")}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [data]
+        base_dir = os.path.dirname(os.path.abspath(path))
+        for template in data:
+            normalized = _normalize(template, base_dir)
+            templates[normalized["name"]] = normalized
+    return templates
+
+
+def _field_values(batch, spec):
+    """按字段定义从列式记录取出整列文本（空单元格为空字符串，列不存在时同样为空字符串）"""
+    column = spec["column"]
+    if spec.get("split"):
+        values = batch.last_segment(column, spec["split"])
+    elif spec.get("collapse_whitespace"):
+        values = batch.collapsed(column)
+    elif spec.get("strip"):
+        values = batch.stripped(column)
+    else:
+        values = batch.text(column)
+    return values.tolist()
+
+
+class CompiledEmailTemplate:
+    """编译后的邮件模板（签名在编译时写入HTML外壳）"""
+
+    # 编译时代替正文的标记，用于把HTML外壳切分为正文前后两段
+    _BODY_MARK = "\x00body\x00"
+
+    def __init__(self, template, signature=""):
+        self.name = template["name"]
+        self._subject = Template(template["subject"])
+        self._body = Template(template["body"])
+        self._fields = list(template["fields"].items())
+        shell = Template(template["html_shell"]).safe_substitute(body=self._BODY_MARK, signature=signature or "")
+        self._html_head, self._html_tail = shell.split(self._BODY_MARK, 1)
+
+    @property
+    def columns(self):
+        """模板用到的Sheet1列序号"""
+        return tuple(sorted({spec["column"] for _, spec in self._fields}))
+
+    def render_batch(self, batch):
+        """
+        批量生成：按列一次取出所有字段值，再逐行填充主题和正文（正文写入HTML前转义）
+        :param batch: utils.sheet_records.RecordBatch（需包含columns中的列）
+        :return: [(主题, HTML正文)]，与batch中的行一一对应
+        """
+        names = [field_name for field_name, _ in self._fields]
+        columns = [_field_values(batch, spec) for _, spec in self._fields]
+        head, tail = self._html_head, self._html_tail
+        rendered = []
+        for row_values in zip(*columns) if columns else ((),) * len(batch):
+            values = dict(zip(names, row_values))
+            body = self._body.substitute(values)
+            rendered.append((self._subject.substitute(values), head + html.escape(body, quote=False) + tail))
+        return rendered
+
+
+def select_template(name=None, path=None):
+    """按名称加载模板（名称为None时使用内置模板），模板不存在或无效时抛出ValueError"""
+    templates = load_templates(path)
+    name = name or DEFAULT_TEMPLATE_NAME
+    try:
+        return templates[name]
+    except KeyError:
+        raise ValueError(f"未找到邮件模板：{name}（可选：{', '.join(templates)}）") from None
+
+
+def compile_template(name=None, signature="", path=None):
+    """按名称加载并编译模板"""
+    return CompiledEmailTemplate(select_template(name, path), signature)
@@ -4,68 +4,65 @@
 """
 Excel数据管理工具类
 负责读取Excel文件和解析数据
+
+读取的单元格由 config.EXCEL_CONFIG.excel_data_mapping 声明（单元格如 "C1"，整列如 "C"）。
+所有映射的单元格在一次只读遍历中取出（只遍历涉及的行），结果按文件版本（大小、修改时间）缓存，
+文件未修改时重复读取直接返回缓存。
 """
 
 import os
 import re
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional
 
 try:
     import openpyxl
+    from openpyxl.utils import column_index_from_string
 except ImportError as e:
     logging.error(f"缺少依赖库: {e}")
     raise
 
 from .config import EXCEL_CONFIG
+from .address_parser import AddressParser
+
+# 单元格引用（"C1"、"$C$1"）或列（"C"）
+_CELL_REFERENCE = re.compile(r'^\$?([A-Za-z]{1,3})\$?(\d*)$')
+
+# 读取结果缓存：{(文件, 工作表, 映射, 读取方式): ((文件大小, 修改时间), 结果)}
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def parse_mapping(mapping: Dict[str, str]) -> Dict[str, tuple]:
+    """
+    解析单元格映射
+
+    Returns:
+        Dict: {字段名: (列序号（从1开始）, 起始行号)}
+
+    Raises:
+        ValueError: 单元格引用无效
+    """
+    parsed = {}
+    for field, reference in mapping.items():
+        match = _CELL_REFERENCE.match(str(reference).strip())
+        if not match:
+            raise ValueError(f"字段 {field} 的单元格引用无效: {reference}")
+        letters, row = match.groups()
+        try:
+            column = column_index_from_string(letters.upper())
+        except ValueError:
+            raise ValueError(f"字段 {field} 的单元格引用无效: {reference}") from None
+        parsed[field] = (column, int(row) if row else 1)
+    return parsed
+
+
+def _company_name(value) -> str:
+    """处理公司名称（提取“/”后的最后部分）"""
+    text = "" if value is None else str(value)
+    return text.split("/")[-1] if "/" in text else text
 
-class AddressParser:
-    """地址解析器"""
-    
-    @staticmethod
-    def parse_address_info(content: str) -> Dict[str, str]:
-        """
-        解析地址、姓名、电话信息
-        
-        Args:
-            content: 包含地址、姓名、电话的文本
-            
-        Returns:
-            Dict: 解析结果，包含address、name、phone字段
-        """
-        if not content:
-            return {"address": "", "name": "", "phone": ""}
-        
-        # 清理文本
-        content = content.replace('\n', ' ').strip()
-        content = re.sub(r'\s+', ' ', content)
-        
-        # 定义解析模式（从精确到模糊）
-        patterns = [
-            # 最精确的模式：地址格式（路/街/巷/道 + 门牌号）
-            (r'([\u4e00-\u9fa50-9a-zA-Z\s\-\.号楼路街巷区镇省市县]+?[路街巷道]\s*\d+[号号楼]?)\s+([^\d]+?)\s+(\d{10,11})$',
-             ['address', 'name', 'phone']),
-            
-            # 次精确模式：包含数字的地址
-            (r'([\u4e00-\u9fa50-9a-zA-Z\s\-\.号楼路街巷区镇省市县]+?\d+)\s+([^\d]+?)\s+(\d{10,11})$',
-             ['address', 'name', 'phone']),
-            
-            # 宽松模式：任意格式，电话必须是10-11位数字
-            (r'(.*?)\s+([^\d]+?)\s+(\d{10,11})$',
-             ['address', 'name', 'phone'])
-        ]
-        
-        for pattern, keys in patterns:
-            match = re.match(pattern, content)
-            if match:
-                return {
-                    keys[0]: match.group(1).strip(),
-                    keys[1]: match.group(2).strip(),
-                    keys[2]: match.group(3).strip()
-                }
-        
-        # 如果没有匹配到任何模式，返回空值
-        return {"address": "", "name": "", "phone": ""}
 
 class ExcelManager:
     """Excel管理器"""
@@ -80,14 +77,33 @@ class ExcelManager:
         
         Args:
             excel_path: Excel文件路径，如果为None则使用默认路径
-            
+        
         Returns:
             Dict: 包含公司名称和地址信息的字典
-            
+        
+        Raises:
+            FileNotFoundError: 文件不存在
+            Exception: 读取失败
+        """
+        result = dict(self._read(excel_path, single=True)[0])
+        self.logger.debug(f"读取到的数据: {result}")
+        return result
+    
+    def read_records(self, excel_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        读取映射列中的所有记录（从各字段的起始行开始到工作表末尾，跳过映射的单元格全部为空的行）
+        
+        Returns:
+            List[Dict]: 每行一条记录，字段与 read_excel_data 相同，另含 row（Excel行号）
+        
         Raises:
             FileNotFoundError: 文件不存在
             Exception: 读取失败
         """
+        return [dict(record) for record in self._read(excel_path, single=False)]
+    
+    def _read(self, excel_path: Optional[str], single: bool) -> List[Dict[str, Any]]:
+        """读取并缓存：文件版本与缓存一致时直接返回缓存的记录"""
         if not excel_path:
             excel_path = EXCEL_CONFIG.default_excel_path
         
@@ -100,40 +116,95 @@ class ExcelManager:
             raise FileNotFoundError(error_msg)
         
         try:
-            # 打开工作簿
-            wb = openpyxl.load_workbook(excel_path, data_only=True)
-            sheet = wb.active
+            mapping = parse_mapping(EXCEL_CONFIG.excel_data_mapping)
+            sheet_name = EXCEL_CONFIG.sheet_name
+            stat_result = os.stat(excel_path)
+            version = (stat_result.st_size, stat_result.st_mtime_ns)
+            key = (os.path.normcase(os.path.abspath(excel_path)), sheet_name, tuple(mapping.items()), single)
             
-            # 读取数据
-            company_name_cell = EXCEL_CONFIG.excel_data_mapping["company_name"]
-            address_info_cell = EXCEL_CONFIG.excel_data_mapping["address_info"]
+            with _memo_lock:
+                cached = _memo.get(key)
+            if cached is not None and cached[0] == version:
+                self.logger.info("Excel文件未修改，使用已读取的数据")
+                return cached[1]
             
-            company_name = sheet[company_name_cell].value or ""
-            address_info = sheet[address_info_cell].value or ""
+            first_row, rows = self._read_mapped_rows(excel_path, sheet_name, mapping, single)
             
-            # 处理公司名称（提取最后部分）
-            content_to_paste = company_name.split("/")[-1] if company_name and "/" in company_name else company_name
+            def cell(row, column):
+                index = row - first_row
+                values = rows[index] if 0 <= index < len(rows) else ()
+                return values[column] if column < len(values) else None
             
-            # 解析地址信息
-            parsed_info = self.parser.parse_address_info(address_info)
-            
-            result = {
-                "company_name": content_to_paste,
-                "customer_address": parsed_info["address"],
-                "customer_name": parsed_info["name"],
-                "customer_phone": parsed_info["phone"]
-            }
+            if single:
+                # 单条读取：每个字段取其映射的单元格
+                columns = {field: [cell(row, column)] for field, (column, row) in mapping.items()}
+                records = self._build_records(columns, [None])
+            else:
+                # 整列读取：各字段从自身起始行开始，跳过映射的单元格全部为空的行
+                row_numbers = range(first_row, first_row + len(rows))
+                columns = {field: [cell(row, column) if row >= start else None for row in row_numbers]
+                           for field, (column, start) in mapping.items()}
+                filled = [any(value not in (None, "") for value in values)
+                          for values in zip(*columns.values())] if columns else []
+                records = [record for record, keep in zip(self._build_records(columns, row_numbers), filled) if keep]
             
+            with _memo_lock:
+                _memo[key] = (version, records)
             self.logger.info("Excel数据读取成功")
-            self.logger.debug(f"读取到的数据: {result}")
-            
-            return result
-            
+            return records
+        
         except Exception as e:
             error_msg = f"读取Excel文件失败: {e}"
             self.logger.error(error_msg)
             raise Exception(error_msg)
     
+    @staticmethod
+    def _read_mapped_rows(excel_path: str, sheet_name: Optional[str], mapping: Dict[str, tuple], single: bool):
+        """
+        一次只读遍历取出映射单元格所在的行（只遍历涉及的行，单条读取时到最后一个映射的单元格为止）
+        
+        Returns:
+            tuple: (起始行号, 行值元组列表)，行值元组从第1列开始
+        """
+        if not mapping:
+            return 1, []
+        first_row = min(row for _, row in mapping.values())
+        last_row = max(row for _, row in mapping.values()) if single else None
+        max_column = max(column for column, _ in mapping.values())
+        
+        # data_only：公式单元格取上次计算的值
+        wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+        try:
+            sheet = wb[sheet_name] if sheet_name else wb.active
+            # 保留第1列起的位置，映射中的列序号可直接作为下标
+            rows = [(None,) + values for values in sheet.iter_rows(
+                min_row=first_row, max_row=last_row, max_col=max_column, values_only=True)]
+        finally:
+            wb.close()
+        return first_row, rows
+    
+    def _build_records(self, columns: Dict[str, list], row_numbers) -> List[Dict[str, Any]]:
+        """按字段组合为记录：公司名称取最后一段，地址信息批量解析为地址、姓名、电话"""
+        count = len(row_numbers)
+        companies = columns.get("company_name", [None] * count)
+        parsed = self.parser.parse_many(columns.get("address_info", [None] * count))
+        extra = {field: values for field, values in columns.items() if field not in ("company_name", "address_info")}
+        
+        records = []
+        for index, row in enumerate(row_numbers):
+            record = {
+                "company_name": _company_name(companies[index]),
+                "customer_address": parsed[index]["address"],
+                "customer_name": parsed[index]["name"],
+                "customer_phone": parsed[index]["phone"],
+            }
+            for field, values in extra.items():
+                record[field] = values[index]
+            if row is not None:
+                record["row"] = row
+            records.append(record)
+        return records
+    
     def validate_excel_data(self, data: Dict[str, Any]) -> bool:
         """
         验证Excel数据的完整性
@@ -167,3 +238,14 @@ class ExcelManager:
         """设置Excel路径"""
         EXCEL_CONFIG.default_excel_path = path
         self.logger.info(f"设置Excel路径: {path}")
+
+
+_shared_manager = None
+
+
+def get_excel_manager() -> ExcelManager:
+    """各模块共用的ExcelManager（读取结果缓存在模块级，与实例无关）"""
+    global _shared_manager
+    if _shared_manager is None:
+        _shared_manager = ExcelManager()
+    return _shared_manager
@@ -1,8 +1,20 @@
 import os
 import re
+import sys
+import time
 import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox, scrolledtext
 
+# Get the directory of the current script
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# Get the project root (parent of modules directory)
+project_root = os.path.dirname(current_dir)
+# Add project root to Python path if not already there
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from modules.search_engine import FileContentSearch
+
 def setup_gui(root):
     """设置GUI界面"""
     root.title("文件内容搜索工具 (优化版)")
@@ -24,73 +36,68 @@ def setup_gui(root):
     result_text.pack(fill=tk.BOTH, expand=True)
 
 
+# 结果缓冲：按固定间隔合并写入文本框，避免每条结果都刷新界面
+RESULT_FLUSH_INTERVAL = 0.1
+_pending_results = []
+_last_flush = 0.0
+
 def add_result(message):
-    """向结果区添加文本"""
+    """向结果区添加文本（先进入缓冲区，按固定间隔批量刷新）"""
+    _pending_results.append(message)
+    if time.monotonic() - _last_flush >= RESULT_FLUSH_INTERVAL:
+        flush_results()
+
+def flush_results():
+    """把缓冲的结果一次性写入结果区并刷新界面"""
+    global _last_flush
+    _last_flush = time.monotonic()
+    if not _pending_results:
+        return
+    text = "\n".join(_pending_results) + "\n"
+    _pending_results.clear()
     result_text.config(state='normal')
-    result_text.insert(tk.END, message + "\n")
+    result_text.insert(tk.END, text)
     result_text.see(tk.END)  # 自动滚动到底部
     result_text.config(state='disabled')
     root.update_idletasks()
 
 def clear_results():
     """清空结果区"""
+    _pending_results.clear()
     result_text.config(state='normal')
     result_text.delete('1.0', tk.END)
     result_text.config(state='disabled')
 
-def find_files_with_progress(root_dir, search_content, file_names=None, case_sensitive=False):
+def find_files_with_progress(root_dir, search_content, file_names=None, case_sensitive=False, use_index=True):
     """
     搜索指定目录下的文件
+    :param use_index: 是否使用内容索引（未变化的文件直接从索引读取）
     """
-    found_files = []
-
-    # 1. 如果没有指定文件名，默认搜索常见配置文件
-    if file_names is None:
-        file_names = ['config.kmg']
-
-    # 2. 开始搜索
-    add_result(f"\n开始搜索内容: '{search_content}' (文件名: {', '.join(file_names)})")
-
-    for root, _, files in os.walk(root_dir):
-        for file in files:
-            file_lower = file.lower()
-            # 检查文件名是否匹配（不区分大小写）
-            if any(file_lower == name.lower() for name in file_names):
-                file_path = os.path.join(root, file)
-                
-                try:
-                    # 尝试多种编码读取文件
-                    encodings = ['utf-8', 'gb18030', 'gbk', 'latin-1']
-                    content_found = False
-
-                    for encoding in encodings:
-                        try:
-                            with open(file_path, 'r', encoding=encoding) as f:
-                                for line_num, line in enumerate(f, 1):
-                                    if search_content.lower() in line.lower():
-                                        # 找到匹配内容
-                                        add_result(f"\n 找到匹配文件: {file_path}")
-                                        add_result(f"   行号: {line_num}, 匹配行: {line.strip()}")
-                                        found_files.append((file_path, line_num, line.strip()))
-                                        content_found = True
-                                        break  # 找到后跳出编码循环
-                            if content_found:
-                                break
-                        except UnicodeDecodeError:
-                            continue  # 尝试下一种编码
-                        except Exception as e:
-                            add_result(f"\n 读取文件 {file_path} 时出错: {e}")
-                            break
-
-                except Exception as e:
-                    add_result(f"\n访问文件 {file_path} 时发生错误: {e}")
+    search = FileContentSearch(root_dir, search_content, file_names=file_names,
+                               case_sensitive=case_sensitive, use_index=use_index)
+
+    # 1. 开始搜索
+    add_result(f"\n开始搜索内容: '{search_content}' (文件名: {', '.join(search.file_names)})")
+
+    # 2. 逐条显示搜索引擎产出的结果
+    for event in search.iter_results():
+        if event["type"] == "match":
+            add_result(f"\n 找到匹配文件: {event['path']}")
+            add_result(f"   行号: {event['line']}, 匹配行: {event['text']}")
+        elif event["type"] == "error":
+            add_result(f"\n 读取文件 {event['path']} 时出错: {event['message']}")
 
     # 3. 完成搜索
     add_result("\n" + "="*50)
-    if found_files:
-        add_result(f"搜索完成! 共找到 {len(found_files)} 个匹配项。")
+    if search.index_error:
+        add_result(f"内容索引不可用，已直接读取文件: {search.index_error}")
+    if search.use_index:
+        add_result(f"内容索引：命中 {search.index_hits} 个，重新读取 {search.index_misses} 个")
+    if search.match_count:
+        add_result(f"搜索完成! 共找到 {search.match_count} 个匹配项。")
     else:
         add_result(f"搜索完成! 未找到包含 '{search_content}' 的文件。")
+    flush_results()
 
 def start_search():
     """开始搜索的触发函数"""
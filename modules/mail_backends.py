@@ -0,0 +1,286 @@
+# modules/mail_backends.py
+"""
+邮件后端
+OutlookEmailThread 通过后端创建和显示邮件，生成逻辑与Outlook解耦：
+    outlook —— 通过COM调用本机Outlook（默认），创建邮件窗口供人工检查后发送
+    eml     —— 把每封邮件写成 .eml 文件（可直接用Outlook打开），无需Outlook，可在任何系统上批量运行和计时
+    smtp    —— 发送到本地SMTP替身服务器（如 python -m aiosmtpd -n -l localhost:1025），用于记录和检查生成结果
+
+每个后端提供 wait_ready()：代替原来每封邮件固定 time.sleep(1)，只在后端确实需要时等待。
+"""
+import os
+import re
+import time
+from email.message import EmailMessage
+from email.policy import SMTP as SMTP_POLICY
+
+from .outlook_connection import OutlookConnector
+
+
+# Lazy import for pythoncom（非Windows环境或不使用Outlook时无需安装）
+def get_pythoncom():
+    import pythoncom
+    return pythoncom
+
+
+# 邮件处理方式：display 逐封打开邮件窗口；drafts 直接保存（不打开窗口、不等待）
+DELIVERY_MODES = ("display", "drafts")
+OL_FOLDER_DRAFTS = 16  # Outlook默认文件夹常量 olFolderDrafts
+
+READY_TIMEOUT = 5.0        # 等待Outlook邮件窗口就绪的最长时间（秒）
+READY_POLL_INTERVAL = 0.05  # 检查邮件窗口是否就绪的间隔（秒）
+
+
+class MailBackend:
+    """邮件后端接口"""
+    name = ""
+    requires_com = False  # 是否需要在线程中初始化COM
+    has_ui = False  # display()是否会打开窗口
+
+    def __init__(self, log=None):
+        self.log = log or (lambda message: None)
+        self.created = 0
+
+    @property
+    def application(self):
+        """后端使用的Outlook应用对象（非Outlook后端为None）"""
+        return None
+
+    def open(self):
+        """连接后端，成功返回True"""
+        return True
+
+    def create_mail(self, subject, html_body, to, cc):
+        """创建一封邮件，返回后端自己的邮件对象"""
+        raise NotImplementedError
+
+    def display(self, mail):
+        """显示邮件供人工检查（无界面的后端为空操作）"""
+
+    def wait_ready(self, mail, timeout=READY_TIMEOUT):
+        """等待后端处理完这封邮件，返回是否就绪（同步写入的后端立即返回True）"""
+        return True
+
+    def save(self, mail, folder=None):
+        """
+        把邮件保存为草稿（不显示）
+        :param folder: 目标文件夹（用/分隔的路径），为None时保存到默认位置
+        :return: 保存后的邮件对象（之后可传给display()）
+        """
+        return mail
+
+    def drafts_location(self, folder=None):
+        """草稿保存位置的说明（用于日志）"""
+        return folder or "草稿箱"
+
+    def describe(self, mail):
+        """邮件的简短说明（用于日志）"""
+        return ""
+
+    def close(self):
+        """释放后端资源"""
+
+
+def split_recipients(recipients):
+    """拆分Outlook格式（分号分隔）的收件人"""
+    return [address.strip() for address in recipients.split(";") if address.strip()]
+
+
+def _format_recipients(recipients):
+    """转换为邮件头格式（逗号分隔）；Outlook中的显示名（如“Zhu, Zhiming”）含逗号时加引号"""
+    return ", ".join(f'"{address}"' if "," in address else address for address in split_recipients(recipients))
+
+
+def build_message(subject, html_body, to, cc, sender=""):
+    """构建MIME邮件"""
+    message = EmailMessage(policy=SMTP_POLICY)
+    message["Subject"] = subject
+    if sender:
+        message["From"] = sender
+    message["To"] = _format_recipients(to)
+    if cc:
+        message["Cc"] = _format_recipients(cc)
+    message.set_content(html_body, subtype="html")
+    return message
+
+
+class OutlookComBackend(MailBackend):
+    """通过COM调用本机Outlook"""
+    name = "outlook"
+    requires_com = True
+    has_ui = True
+
+    def __init__(self, log=None):
+        super().__init__(log)
+        self._outlook = None
+        self._folders = {}  # {文件夹路径: Outlook文件夹对象}
+
+    @property
+    def application(self):
+        return self._outlook
+
+    def open(self):
+        # 优先连接正在运行的Outlook，成功的连接方式记录在应用配置中
+        self._outlook = OutlookConnector(log=self.log).connect()
+        return self._outlook is not None
+
+    def create_mail(self, subject, html_body, to, cc):
+        mail = self._outlook.CreateItem(0)
+        mail.Subject = subject
+        mail.HTMLBody = html_body
+        mail.To = to
+        mail.CC = cc
+        self.created += 1
+        return mail
+
+    def display(self, mail):
+        mail.Display()
+
+    def wait_ready(self, mail, timeout=READY_TIMEOUT):
+        """处理COM消息直到邮件窗口（Inspector）创建完成，代替固定等待"""
+        pythoncom = get_pythoncom()
+        deadline = time.perf_counter() + timeout
+        while True:
+            pythoncom.PumpWaitingMessages()
+            try:
+                if mail.GetInspector is not None:
+                    return True
+            except Exception:
+                # Outlook忙于处理上一封邮件时COM调用会被拒绝，稍后重试
+                pass
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(READY_POLL_INTERVAL)
+
+    def save(self, mail, folder=None):
+        # Save()保存到草稿箱；指定文件夹时再移动过去（Move返回移动后的新对象）
+        mail.Save()
+        if folder:
+            mail = mail.Move(self._resolve_folder(folder))
+        return mail
+
+    def _resolve_folder(self, folder):
+        """按路径查找默认邮箱中的文件夹（相对于邮箱根目录），不存在的层级自动创建"""
+        resolved = self._folders.get(folder)
+        if resolved is not None:
+            return resolved
+        namespace = self._outlook.GetNamespace("MAPI")
+        current = namespace.GetDefaultFolder(OL_FOLDER_DRAFTS).Parent
+        for name in re.split(r'[\\/]+', folder.strip("\\/")):
+            try:
+                current = current.Folders.Item(name)
+            except Exception:
+                current = current.Folders.Add(name)
+                self.log(f"已创建Outlook文件夹：{name}")
+        self._folders[folder] = current
+        return current
+
+    def describe(self, mail):
+        return "Outlook窗口"
+
+    def close(self):
+        self._outlook = None
+        self._folders = {}
+
+
+class EmlFileBackend(MailBackend):
+    """把每封邮件写成 .eml 文件（文件名按生成顺序编号）"""
+    name = "eml"
+
+    def __init__(self, output_dir, log=None, sender=""):
+        super().__init__(log)
+        self.output_dir = output_dir
+        self.sender = sender
+
+    def open(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        return True
+
+    def create_mail(self, subject, html_body, to, cc):
+        self.created += 1
+        # 主题中不能用于文件名的字符替换为下划线
+        safe_subject = re.sub(r'[\\/:*?"<>|\r\n]+', '_', subject).strip()[:80]
+        path = os.path.join(self.output_dir, f"{self.created:04d}_{safe_subject}.eml")
+        message = build_message(subject, html_body, to, cc, self.sender)
+        # Outlook打开带X-Unsent的.eml时作为未发送的草稿（可编辑、可直接发送）
+        message["X-Unsent"] = "1"
+        with open(path, "wb") as f:
+            f.write(message.as_bytes())
+        return path
+
+    def save(self, mail, folder=None):
+        # 文件在create_mail时已写入；指定文件夹时移动到输出文件夹下的子文件夹
+        if not folder:
+            return mail
+        target_dir = os.path.join(self.output_dir, folder)
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, os.path.basename(mail))
+        os.replace(mail, target)
+        return target
+
+    def drafts_location(self, folder=None):
+        return os.path.join(self.output_dir, folder) if folder else self.output_dir
+
+    def describe(self, mail):
+        return mail
+
+
+class SmtpBackend(MailBackend):
+    """发送到本地SMTP替身服务器（只用于测试，不要指向真实的邮件服务器）"""
+    name = "smtp"
+
+    def __init__(self, host="localhost", port=1025, log=None, sender="automation-tool@localhost"):
+        super().__init__(log)
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self._smtp = None
+
+    def open(self):
+        import smtplib
+        try:
+            self._smtp = smtplib.SMTP(self.host, self.port, timeout=10)
+        except OSError as e:
+            self.log(f"无法连接SMTP服务器 {self.host}:{self.port}: {str(e)}")
+            return False
+        return True
+
+    def create_mail(self, subject, html_body, to, cc):
+        message = build_message(subject, html_body, to, cc, self.sender)
+        recipients = split_recipients(f"{to};{cc}")
+        self._smtp.send_message(message, from_addr=self.sender, to_addrs=recipients)
+        self.created += 1
+        return message
+
+    def drafts_location(self, folder=None):
+        return f"SMTP服务器 {self.host}:{self.port}"
+
+    def describe(self, mail):
+        return f"已发送到 {self.host}:{self.port}"
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+MAIL_BACKENDS = {
+    OutlookComBackend.name: OutlookComBackend,
+    EmlFileBackend.name: EmlFileBackend,
+    SmtpBackend.name: SmtpBackend,
+}
+
+
+def create_backend(name, log=None, **options):
+    """
+    按名称创建邮件后端
+    :param options: 后端参数（eml: output_dir；smtp: host、port）
+    """
+    try:
+        backend_class = MAIL_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的邮件后端：{name}（可选：{', '.join(MAIL_BACKENDS)}）") from None
+    return backend_class(log=log, **options)
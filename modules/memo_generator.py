@@ -1,9 +1,11 @@
 # modules/memo_generator.py
-import openpyxl
-from docx import Document
+import io
+import zipfile
 from datetime import datetime, timedelta
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Get the directory of the current script
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,16 +16,184 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from utils.file_utils import find_excel_file
+from utils import datasource_cache
+from utils.sheet_records import load_record_batch
+from modules.memo_template import CompiledMemoTemplate, WRITERS, verify_untouched_parts
 
 
-def generate_memo(excel_path=None, template_path=None, output_folder=None, progress_callback=None):
+# 并行生成的默认线程数（保存docx时的zlib压缩和文件写入会释放GIL）
+DEFAULT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+CANCEL_POLL_INTERVAL = 0.2  # 等待工作线程结果时检查取消标记的间隔（秒）
+
+# 输出方式：files 每份MEMO一个docx；merged 合并为一个多节docx（每份一页）；zip 逐个写入一个压缩包
+OUTPUT_MODES = ("files", "merged", "zip")
+# merged/zip模式下generated_files中每项为 "合并文件路径::条目说明"
+ENTRY_SEPARATOR = "::"
+# MEMO使用的Sheet1列：B列序列号（索引1）、C列公司（索引2）、E列设备型号（索引4）
+MEMO_COLUMNS = (1, 2, 4)
+
+
+def _is_canceled(cancel_event):
+    return cancel_event is not None and cancel_event.is_set()
+
+
+def _wait_result(future, cancel_event):
+    """等待单个生成任务完成（期间响应取消），取消时返回None"""
+    while True:
+        if _is_canceled(cancel_event):
+            return None
+        try:
+            return future.result(timeout=CANCEL_POLL_INTERVAL)
+        except FutureTimeoutError:
+            continue
+
+
+def _parse_memo_rows(batch):
+    """
+    从Sheet1列式记录整理每行的MEMO字段（至少需要序列号、公司名称、设备型号）
+    :return: [(Excel行号, (字段字典, None))]；数据不完整的行为 (Excel行号, (None, 跳过原因))
+    """
+    sn = batch.stripped(1).tolist()
+    company_full = batch.stripped(2).tolist()
+    model = batch.stripped(4).tolist()
+    # 解析公司名称（“/”后的部分）
+    company_name = batch.last_segment(2, '/').tolist()
+    complete = batch.complete(MEMO_COLUMNS).tolist()
+
+    # 计算日期（结束日期=今天，开始日期=2天前）
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=2)
+    start_text = start_date.strftime("%Y.%m.%d")
+    end_text = end_date.strftime("%Y.%m.%d")
+
+    rows = []
+    for index, row_index in enumerate(batch.row_numbers.tolist()):
+        if not complete[index]:
+            rows.append((row_index, (None, f"数据不完整（序列号：{sn[index]}，公司：{company_full[index]}，型号：{model[index]}）")))
+            continue
+        rows.append((row_index, ({
+            "买方": company_name[index],
+            "设备型号": model[index],
+            "序列号": sn[index],
+            "安装开始日期": start_text,
+            "安装结束日期": end_text
+        }, None)))
+    return rows
+
+
+def _memo_output_path(output_folder, excel_data):
+    return os.path.join(output_folder, f"{excel_data['序列号']}_Filled_memo.docx")
+
+
+def _bundle_path(output_folder, output_mode, timestamp):
+    """merged/zip模式的合并文件路径（files模式返回None）"""
+    if output_mode == "merged":
+        return os.path.join(output_folder, f"Filled_memos_{timestamp}.docx")
+    if output_mode == "zip":
+        return os.path.join(output_folder, f"Filled_memos_{timestamp}.zip")
+    return None
+
+
+def _zip_entry_name(output_path, row_index, entry_names):
+    """压缩包中的条目名（序列号重复时加上行号），并记录到entry_names"""
+    entry_name = os.path.basename(output_path)
+    if entry_name in entry_names:
+        entry_name = f"{os.path.splitext(entry_name)[0]}_第{row_index}行.docx"
+    entry_names.add(entry_name)
+    return entry_name
+
+
+def _merged_entry_name(page, excel_data):
+    """合并文档中的条目说明"""
+    return f"第{page}页 {excel_data['序列号']}"
+
+
+def _verify_output(template, template_path, output):
+    """校验直接写入的docx：模板中未修改的部件必须与模板逐字节一致"""
+    mismatched = verify_untouched_parts(template_path, output, template.document_member)
+    if mismatched:
+        raise ValueError(f"生成文件与模板部件不一致：{', '.join(mismatched)}")
+
+
+def split_generated_entry(item):
+    """
+    拆分generated_files中的一项
+    :return: (磁盘文件路径, 条目说明)；单独文件模式下条目说明为None
+    """
+    path, _, entry = item.partition(ENTRY_SEPARATOR)
+    return path, entry or None
+
+
+def _dry_run_report(rows, output_folder, output_mode, send_log):
+    """预检查模式：按行报告将要生成的MEMO，并与输出文件夹中的现有文件比较（只读）"""
+    planned = []
+    skipped = 0
+    for row_index, (excel_data, skip_message) in rows:
+        if excel_data is None:
+            skipped += 1
+            send_log(f"跳过第{row_index}行：{skip_message}")
+            continue
+        planned.append((row_index, excel_data, _memo_output_path(output_folder, excel_data)))
+
+    if not planned:
+        raise ValueError("未生成任何MEMO，请检查Excel数据是否完整")
+
+    if output_mode == "files":
+        new_count = overwrite_count = 0
+        repeated = set()
+        for row_index, excel_data, output_path in planned:
+            if output_path in repeated:
+                status = "覆盖本批次前面的行（序列号重复）"
+            elif os.path.exists(output_path):
+                status = "覆盖现有文件"
+                overwrite_count += 1
+            else:
+                status = "新建"
+                new_count += 1
+            repeated.add(output_path)
+            send_log(f"📝 第{row_index}行：序列号={excel_data['序列号']}，公司={excel_data['买方']}，"
+                     f"型号={excel_data['设备型号']} → {os.path.basename(output_path)}（{status}）")
+        summary = (f"预检查通过：将生成{len(planned)}份MEMO（新建{new_count}个文件，覆盖{overwrite_count}个，"
+                   f"序列号重复{len(planned) - new_count - overwrite_count}行），跳过{skipped}行")
+        planned_files = [output_path for _, _, output_path in planned]
+    else:
+        # 与实际生成相同的命名：每项为 "合并文件路径::条目说明"（文件名中的时间以实际生成时为准）
+        bundle_path = _bundle_path(output_folder, output_mode, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        entry_names = set()
+        planned_files = []
+        for page, (row_index, excel_data, output_path) in enumerate(planned, 1):
+            if output_mode == "zip":
+                entry_name = _zip_entry_name(output_path, row_index, entry_names)
+            else:
+                entry_name = _merged_entry_name(page, excel_data)
+            planned_files.append(f"{bundle_path}{ENTRY_SEPARATOR}{entry_name}")
+            send_log(f"📝 第{row_index}行：序列号={excel_data['序列号']}，公司={excel_data['买方']}，"
+                     f"型号={excel_data['设备型号']} → {entry_name}")
+        target = "一个合并文档（每份MEMO一页）" if output_mode == "merged" else "一个压缩包"
+        summary = (f"预检查通过：将生成{len(planned)}份MEMO，写入{target} {os.path.basename(bundle_path)}，"
+                   f"跳过{skipped}行")
+
+    send_log(f"\n✅ {summary}")
+    return (True, summary, planned_files)
+
+
+def generate_memo(excel_path=None, template_path=None, output_folder=None, progress_callback=None,
+                  workers=None, cancel_event=None, writer="ooxml", output_mode="files", dry_run=False):
     """
     生成MEMO：从Excel读取数据，为每行非空数据填充Word模板并保存
     :param excel_path: Excel文件路径（默认：tool/datasource.xlsx）
     :param template_path: Word模板路径（默认：tool/MemoTemplate.docx）
     :param output_folder: 生成文件保存文件夹路径（默认：tool/）
     :param progress_callback: 日志回调函数（传递进度到主窗口）
+    :param workers: 并行生成的线程数（None使用DEFAULT_WORKERS，1为逐行生成）
+    :param cancel_event: threading.Event，被设置后停止生成（已生成的文件保留）
+    :param writer: 保存方式："ooxml" 直接写zip（只重新生成word/document.xml），"docx" 通过python-docx保存
+    :param output_mode: 输出方式："files" 每行一个docx；"merged" 一个多节docx（每份MEMO一页）；
+                        "zip" 一个压缩包（随生成顺序逐个写入）
+    :param dry_run: 只做预检查（校验模板、检查Excel各行数据），报告将要生成的文件及与现有文件的差异，
+                    不写入磁盘；此时generated_files为计划生成的项（命名与实际生成相同，merged/zip模式下同样为 "合并文件路径::条目说明"）
     :return: tuple (success: bool, message: str, generated_files: list)
+             merged/zip模式下generated_files每项为 "合并文件路径::条目说明"（见split_generated_entry）
     """
     # 日志发送辅助函数
     def send_log(msg):
@@ -35,7 +205,7 @@ def generate_memo(excel_path=None, template_path=None, output_folder=None, progr
     try:
         # 基础路径：桌面/tool
         tool_folder = os.path.join(os.path.expanduser("~"), "Desktop", "tool")
-        if not os.path.exists(tool_folder):
+        if not os.path.exists(tool_folder) and not dry_run:
             os.makedirs(tool_folder)
             send_log(f"✅ 已创建tool文件夹: {tool_folder}")
 
@@ -52,133 +222,207 @@ def generate_memo(excel_path=None, template_path=None, output_folder=None, progr
         if not output_folder:
             output_folder = tool_folder
 
-        send_log(f"📋 开始执行MEMO生成流程")
+        if writer not in WRITERS:
+            raise ValueError(f"未知的保存方式：{writer}（可选：{', '.join(WRITERS)}）")
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"未知的输出方式：{output_mode}（可选：{', '.join(OUTPUT_MODES)}）")
+
+        send_log(f"📋 开始执行MEMO生成流程" + ("（预检查，不写入任何文件）" if dry_run else ""))
         send_log(f"Excel路径：{excel_path}")
         send_log(f"模板路径：{template_path}")
         send_log(f"输出文件夹：{output_folder}")
 
+        # 预检查模板：只解析一次，所有关键词都必须找到占位符，避免批量生成到中途才失败
+        if not os.path.exists(template_path):
+            raise FileNotFoundError(f"MEMO模板不存在：{template_path}")
+        template = CompiledMemoTemplate(template_path)
+        missing_keywords = template.missing_keywords()
+        if missing_keywords:
+            raise ValueError(
+                f"模板中以下关键词未找到下划线占位符：{'、'.join(missing_keywords)}"
+                f"（请检查模板中的关键词和下划线格式）"
+            )
+        send_log(f"模板已解析：共{len(template.slots)}个占位符，{len(template.keyword_mapping)}个关键词全部匹配")
+
         # 2. 读取Excel数据
         send_log("\n🔍 正在读取Excel数据...")
         if not os.path.exists(excel_path):
             raise FileNotFoundError(f"Excel文件不存在：{excel_path}")
 
-        # 读取Excel（无表头，取Sheet1工作表）
-        workbook = openpyxl.load_workbook(excel_path, read_only=True)
-        try:
-            sheet_names = workbook.sheetnames
-            send_log(f"Excel包含工作表：{sheet_names}")
-            sheet = workbook['Sheet1']
+        # 读取Excel（无表头，取Sheet1工作表；使用共享缓存，文件未修改时不重新打开）
+        workbook = datasource_cache.get_workbook(excel_path)
+        sheet_names = workbook.sheetnames
+        send_log(f"Excel包含工作表：{sheet_names}")
+        sheet = workbook.sheet('Sheet1')
+
+        # Get the actual maximum column count from the sheet
+        max_column = sheet.max_column
+
+        if len(sheet.rows) == 0:
+            raise ValueError("Excel文件中无任何数据行")
+        if max_column < 5:  # 至少需要5列（B列=1、C列=2、E列=4）
+            raise ValueError(f"Excel列数不足（当前{max_column}列，需至少5列）")
+
+        generated_files = []
+        memo_count = 0
+
+        # 整理每行数据（只读取需要的列，整列判断数据是否完整；渲染与保存可在线程池中并行，日志仍按行顺序输出）
+        rows = _parse_memo_rows(load_record_batch(excel_path, MEMO_COLUMNS))
+
+        if dry_run:
+            return _dry_run_report(rows, output_folder, output_mode, send_log)
+
+        def render_output(excel_data, output_path, row_template):
+            # 填充Word模板（深拷贝预编译模板的XML，直接填充已定位的占位符run）
+            element = row_template.render(excel_data)
+            if output_mode == "merged":
+                return element
+            if output_mode == "zip":
+                return row_template.to_bytes(element, writer)
+            row_template.write(element, output_path, writer)
+            if not os.path.exists(output_path):
+                raise Exception(f"MEMO保存失败（文件未生成）：{output_path}")
+            return output_path
 
-            # 读取所有数据
-            data = []
-            for row in sheet.iter_rows(values_only=True):
-                data.append(list(row))
+        def task_key(row_index, excel_data):
+            # 单独文件模式下序列号重复的行写入同一文件，归为同一任务按行顺序写入，避免并发写同一文件
+            return _memo_output_path(output_folder, excel_data) if output_mode == "files" else row_index
 
-            # Get the actual maximum column count from the sheet
-            max_column = sheet.max_column
+        workers = max(1, workers or DEFAULT_WORKERS)
+        executor = None
+        futures = {}  # 已提交、结果尚未全部使用的任务 {任务键: future}
+        remaining = {}  # 各已提交任务还需要使用结果的行数
+        if workers > 1:
+            # 每个工作线程使用自己的模板实例（保存时会替换模板包中的文档部件）
+            local = threading.local()
 
-            if len(data) == 0:
-                raise ValueError("Excel文件中无任何数据行")
-            if max_column < 5:  # 至少需要5列（B列=1、C列=2、E列=4）
-                raise ValueError(f"Excel列数不足（当前{max_column}列，需至少5列）")
+            def render_in_worker(row_values, output_path):
+                if getattr(local, "template", None) is None:
+                    local.template = CompiledMemoTemplate(template_path)
+                result = None
+                for excel_data in row_values:
+                    result = render_output(excel_data, output_path, local.template)
+                return result
 
-            generated_files = []
-            memo_count = 0
+            rows_by_key = {}
+            for row_index, (excel_data, skip_message) in rows:
+                if excel_data is not None:
+                    rows_by_key.setdefault(task_key(row_index, excel_data), []).append(excel_data)
 
+            # 只提前提交有限数量的任务（压缩包模式下每个结果是整份docx的字节，不能让整批结果同时留在内存中）
+            window = workers * 2
+            pending_tasks = iter(rows_by_key.items())
+
+            def submit_next():
+                """按行顺序提交下一个任务，没有剩余任务时返回False"""
+                task = next(pending_tasks, None)
+                if task is None:
+                    return False
+                key, row_values = task
+                remaining[key] = len(row_values)
+                futures[key] = executor.submit(render_in_worker, row_values,
+                                               _memo_output_path(output_folder, row_values[0]))
+                return True
+
+            def submit_ahead():
+                while len(futures) < window and submit_next():
+                    pass
+
+            send_log(f"⚙️  并行生成：{workers}个线程")
+            executor = ThreadPoolExecutor(max_workers=workers)
+            submit_ahead()
+
+        # 汇总输出：合并文档在最后一次性写入；压缩包随生成顺序逐个写入条目
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        merged_elements = []
+        bundle_path = _bundle_path(output_folder, output_mode, timestamp)
+        archive = None
+        if output_mode == "zip":
+            # docx本身已压缩，条目直接存储
+            archive = zipfile.ZipFile(bundle_path, "w", zipfile.ZIP_STORED)
+            entry_names = set()
+        if bundle_path:
+            send_log(f"输出方式：{'合并文档（每份MEMO一页）' if output_mode == 'merged' else '压缩包'} {bundle_path}")
+
+        def canceled_result():
+            send_log(f"⏹️  MEMO生成已取消，已生成{memo_count}个文件")
+            return (False, f"MEMO生成已取消，已生成{memo_count}个文件", generated_files)
+
+        try:
             # 循环处理每行数据
-            for row_index, row in enumerate(data, start=1):
-                # 检查是否为非空行（至少有序列号、公司名称、设备型号）
-                sn = str(row[1]).strip() if len(row) > 1 and row[1] is not None else ""
-                company_full = str(row[2]).strip() if len(row) > 2 and row[2] is not None else ""
-                model = str(row[4]).strip() if len(row) > 4 and row[4] is not None else ""
-
-                if not sn or not company_full or not model:
-                    send_log(f"跳过第{row_index}行：数据不完整（序列号：{sn}，公司：{company_full}，型号：{model}）")
+            for row_index, (excel_data, skip_message) in rows:
+                if _is_canceled(cancel_event):
+                    if output_mode == "merged":
+                        generated_files = []  # 合并文档尚未写入
+                    return canceled_result()
+
+                if excel_data is None:
+                    send_log(f"跳过第{row_index}行：{skip_message}")
                     continue
 
-                # 解析公司名称
-                company_name = company_full.split('/')[-1].strip() if '/' in company_full else company_full
-
-                send_log(f"\n📝 处理第{row_index}行数据：序列号={sn}，公司={company_name}，型号={model}")
-
-                # 计算日期（结束日期=今天，开始日期=2天前）
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=2)
-                excel_data = {
-                    "买方": company_name,
-                    "设备型号": model,
-                    "序列号": sn,
-                    "安装开始日期": start_date.strftime("%Y.%m.%d"),
-                    "安装结束日期": end_date.strftime("%Y.%m.%d")
-                }
-
-                # 3. 填充Word模板
-                doc = Document(template_path)
-                keyword_mapping = {  # 关键词→数据字段的映射
-                    "买方：": "买方",
-                    "已完成": "设备型号",
-                    "序列号：": "序列号",
-                    "日期从": "安装开始日期",
-                    "至": "安装结束日期"
-                }
-                placeholder_count = 0  # 成功替换的占位符数量
-
-                # 处理段落中的下划线占位符
-                for paragraph in doc.paragraphs:
-                    for keyword, data_key in keyword_mapping.items():
-                        if keyword in paragraph.text:
-                            found_keyword = False
-                            for run in paragraph.runs:
-                                # 先找到关键词，再找后续的下划线
-                                if not found_keyword and keyword in run.text:
-                                    found_keyword = True
-                                    continue
-                                # 替换关键词后的第一个下划线
-                                if found_keyword and run.underline:
-                                    run.text = excel_data[data_key]
-                                    placeholder_count += 1
-                                    break  # 只替换第一个匹配的下划线
-
-                # 处理表格中的下划线占位符
-                for table in doc.tables:
-                    for table_row in table.rows:
-                        for cell in table_row.cells:
-                            for paragraph in cell.paragraphs:
-                                for keyword, data_key in keyword_mapping.items():
-                                    if keyword in paragraph.text:
-                                        found_keyword = False
-                                        for run in paragraph.runs:
-                                            if not found_keyword and keyword in run.text:
-                                                found_keyword = True
-                                                continue
-                                            if found_keyword and run.underline:
-                                                run.text = excel_data[data_key]
-                                                placeholder_count += 1
-                                                break
-
-                # 校验替换结果
-                if placeholder_count == 0:
-                    raise ValueError(f"❌ 第{row_index}行未替换任何占位符！请检查模板中的关键词和下划线格式")
-
-                # 4. 保存生成的MEMO
-                output_filename = f"{sn}_Filled_memo.docx"
-                output_path = os.path.join(output_folder, output_filename)
-                doc.save(output_path)
-                if not os.path.exists(output_path):
-                    raise Exception(f"MEMO保存失败（文件未生成）：{output_path}")
-
-                generated_files.append(output_path)
-                memo_count += 1
-                send_log(f"✅ 第{row_index}行MEMO生成成功！路径：{output_path}")
+                send_log(f"\n📝 处理第{row_index}行数据：序列号={excel_data['序列号']}，"
+                         f"公司={excel_data['买方']}，型号={excel_data['设备型号']}")
+
+                # 3-4. 填充模板并生成MEMO
+                output_path = _memo_output_path(output_folder, excel_data)
+                if executor is None:
+                    result = render_output(excel_data, output_path, template)
+                else:
+                    key = task_key(row_index, excel_data)
+                    # 序列号重复的任务可能长期占用窗口，当前行需要的任务总是立即提交
+                    while key not in futures and submit_next():
+                        pass
+                    result = _wait_result(futures[key], cancel_event)
+                    if result is None:
+                        if output_mode == "merged":
+                            generated_files = []
+                        return canceled_result()
+                    # 该任务的结果已全部使用：释放引用并补充提交后续任务
+                    remaining[key] -= 1
+                    if not remaining[key]:
+                        del futures[key]
+                    submit_ahead()
 
-            if memo_count == 0:
-                raise ValueError("未生成任何MEMO，请检查Excel数据是否完整")
+                if output_mode == "files":
+                    if writer == "ooxml" and memo_count == 0:
+                        _verify_output(template, template_path, output_path)
+                    generated_files.append(output_path)
+                    send_log(f"✅ 第{row_index}行MEMO生成成功！路径：{output_path}")
+                elif output_mode == "zip":
+                    if writer == "ooxml" and memo_count == 0:
+                        _verify_output(template, template_path, io.BytesIO(result))
+                    entry_name = _zip_entry_name(output_path, row_index, entry_names)
+                    archive.writestr(entry_name, result)
+                    generated_files.append(f"{bundle_path}{ENTRY_SEPARATOR}{entry_name}")
+                    send_log(f"✅ 第{row_index}行MEMO已写入压缩包：{entry_name}")
+                else:
+                    merged_elements.append(result)
+                    entry_name = _merged_entry_name(len(merged_elements), excel_data)
+                    generated_files.append(f"{bundle_path}{ENTRY_SEPARATOR}{entry_name}")
+                    send_log(f"✅ 第{row_index}行MEMO已加入合并文档：{entry_name}")
+                memo_count += 1
 
-            send_log(f"\n✅ 全部MEMO生成完成！共生成{memo_count}个文件")
-            return (True, f"MEMO生成成功，共生成{memo_count}个文件", generated_files)
+            if output_mode == "merged" and merged_elements:
+                template.write(template.merge(merged_elements), bundle_path, writer)
+                if writer == "ooxml":
+                    _verify_output(template, template_path, bundle_path)
+                send_log(f"✅ 合并文档已保存：{bundle_path}")
         finally:
-            # 确保Excel文件被正确关闭
-            workbook.close()
+            if executor is not None:
+                # 取消或出错时丢弃尚未开始的任务
+                executor.shutdown(wait=True, cancel_futures=True)
+            if archive is not None:
+                # 已写入的条目在取消或出错时也保持可用
+                archive.close()
+
+        if memo_count == 0:
+            raise ValueError("未生成任何MEMO，请检查Excel数据是否完整")
+
+        if bundle_path:
+            send_log(f"\n✅ 全部MEMO生成完成！共{memo_count}份，已写入：{bundle_path}")
+            return (True, f"MEMO生成成功，共{memo_count}份，已写入{os.path.basename(bundle_path)}", generated_files)
+        send_log(f"\n✅ 全部MEMO生成完成！共生成{memo_count}个文件")
+        return (True, f"MEMO生成成功，共生成{memo_count}个文件", generated_files)
 
     except FileNotFoundError as e:
         err_msg = f"文件错误：{str(e)}"
@@ -0,0 +1,219 @@
+# modules/memo_template.py
+"""
+预编译的MEMO模板
+只解析一次MemoTemplate.docx，预先计算每个关键词对应的下划线占位符run在文档XML中的位置；
+生成每份MEMO时深拷贝缓存的XML树，直接填充这些run，无需重新解压、解析模板和扫描段落。
+
+保存方式：
+    docx  —— 通过python-docx保存（重新序列化整个包）
+    ooxml —— 直接写zip：模板中未变化的部件（样式、图片等）按字节原样复制，只重新生成 word/document.xml
+"""
+import io
+import zipfile
+from copy import deepcopy
+
+from docx import Document
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml.ns import qn
+
+WRITERS = ("docx", "ooxml")
+
+# 关键词→数据字段的映射：关键词之后的第一个下划线run为该字段的占位符
+KEYWORD_MAPPING = {
+    "买方：": "买方",
+    "已完成": "设备型号",
+    "序列号：": "序列号",
+    "日期从": "安装开始日期",
+    "至": "安装结束日期"
+}
+
+
+class CompiledMemoTemplate:
+    """解析一次、可重复填充的MEMO模板（单个实例不可在多个线程中同时使用）"""
+
+    def __init__(self, template_path, keyword_mapping=None):
+        self.template_path = template_path
+        self.keyword_mapping = keyword_mapping or KEYWORD_MAPPING
+        self.document = Document(template_path)
+        self._element = self.document.element
+        # [(run序号, 数据字段)]：run序号为该run在整个文档 w:r 元素中的顺序
+        self.slots = self._compile()
+        # 文档部件在zip包中的名称（通常为 word/document.xml）
+        self.document_member = self.document.part.partname.lstrip('/')
+        self._base_package = None
+        self._document_zinfo = None
+
+    def _iter_paragraphs(self):
+        """与原逐行替换逻辑相同的扫描顺序：先正文段落，再表格单元格中的段落"""
+        yield from self.document.paragraphs
+        for table in self.document.tables:
+            for table_row in table.rows:
+                for cell in table_row.cells:
+                    yield from cell.paragraphs
+
+    def _compile(self):
+        """定位每个关键词之后的第一个下划线run（合并单元格会被重复遍历，同一run只记录一次）"""
+        run_index = {run: index for index, run in enumerate(self._element.iter(qn('w:r')))}
+        slots = []
+        seen = set()
+        for paragraph in self._iter_paragraphs():
+            paragraph_text = paragraph.text
+            runs = paragraph.runs
+            for keyword, data_key in self.keyword_mapping.items():
+                if keyword not in paragraph_text:
+                    continue
+                found_keyword = False
+                for run in runs:
+                    # 先找到关键词，再找后续的下划线
+                    if not found_keyword and keyword in run.text:
+                        found_keyword = True
+                        continue
+                    # 关键词后的第一个下划线run即为占位符
+                    if found_keyword and run.underline:
+                        slot = (run_index[run._r], data_key)
+                        if slot not in seen:
+                            seen.add(slot)
+                            slots.append(slot)
+                        break
+        return slots
+
+    @property
+    def placeholder_keys(self):
+        """模板中找到占位符的数据字段"""
+        return {data_key for _, data_key in self.slots}
+
+    def missing_keywords(self):
+        """模板中没有找到占位符（关键词或其后的下划线缺失）的关键词列表"""
+        found = self.placeholder_keys
+        return [keyword for keyword, data_key in self.keyword_mapping.items() if data_key not in found]
+
+    def render(self, values):
+        """
+        深拷贝模板XML并填充占位符
+        :param values: {数据字段: 文本}
+        :return: 填充后的 w:document 元素
+        """
+        element = deepcopy(self._element)
+        runs = list(element.iter(qn('w:r')))
+        for index, data_key in self.slots:
+            runs[index].text = values[data_key]
+        return element
+
+    def save(self, element, output_path):
+        """把render()得到的文档元素保存为docx（复用模板的包结构，样式、图片等部件不变）"""
+        part = self.document.part
+        original = part._element
+        part._element = element
+        try:
+            self.document.save(output_path)
+        finally:
+            part._element = original
+
+    def _build_base_package(self):
+        """
+        把模板中除文档部件以外的所有成员写入一个内存zip（只在第一次直接写入时执行一次），
+        之后每份MEMO复制这份字节再追加新的文档部件
+        """
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(self.template_path) as source, zipfile.ZipFile(buffer, "w") as target:
+            for info in source.infolist():
+                if info.filename == self.document_member:
+                    self._document_zinfo = info
+                    continue
+                # 沿用原成员信息（压缩方式、时间戳），内容按字节原样写入
+                target.writestr(info, source.read(info.filename))
+        if self._document_zinfo is None:
+            raise ValueError(f"模板中缺少文档部件：{self.document_member}")
+        self._base_package = buffer.getvalue()
+
+    def ooxml_bytes(self, element):
+        """直接生成docx字节：复制未变化的模板部件，只重新生成文档部件"""
+        if self._base_package is None:
+            self._build_base_package()
+        buffer = io.BytesIO(self._base_package)
+        with zipfile.ZipFile(buffer, "a") as package:
+            info = zipfile.ZipInfo(self.document_member, date_time=self._document_zinfo.date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            package.writestr(info, serialize_part_xml(element))
+        return buffer.getvalue()
+
+    def save_ooxml(self, element, output_path):
+        """直接写入docx：复制未变化的模板部件，只重新生成文档部件"""
+        with open(output_path, "wb") as f:
+            f.write(self.ooxml_bytes(element))
+
+    def to_bytes(self, element, writer="ooxml"):
+        """按指定方式生成填充后文档的docx字节（用于写入压缩包）"""
+        if writer == "ooxml":
+            return self.ooxml_bytes(element)
+        buffer = io.BytesIO()
+        self.write(element, buffer, writer)
+        return buffer.getvalue()
+
+    def write(self, element, output_path, writer="ooxml"):
+        """按指定方式保存填充后的文档（output_path也可以是可写的文件对象）"""
+        if writer == "ooxml":
+            if isinstance(output_path, str):
+                self.save_ooxml(element, output_path)
+            else:
+                output_path.write(self.ooxml_bytes(element))
+        elif writer == "docx":
+            self.save(element, output_path)
+        else:
+            raise ValueError(f"未知的保存方式：{writer}（可选：{', '.join(WRITERS)}）")
+
+    def merge(self, elements):
+        """
+        把多份填充后的文档合并为一个多节文档：每份MEMO为一节，节之间分页
+        :param elements: render()得到的文档元素列表
+        :return: 合并后的 w:document 元素（可传给write()保存）
+        """
+        merged = deepcopy(self._element)
+        body = merged.find(qn('w:body'))
+        final_sect_pr = body.find(qn('w:sectPr'))
+        for child in list(body):
+            if child is not final_sect_pr:
+                body.remove(child)
+
+        for index, element in enumerate(elements):
+            source_body = element.find(qn('w:body'))
+            for child in list(source_body):
+                if child.tag == qn('w:sectPr'):
+                    continue
+                if final_sect_pr is not None:
+                    final_sect_pr.addprevious(child)
+                else:
+                    body.append(child)
+            if index < len(elements) - 1 and final_sect_pr is not None:
+                # 分节符：段落属性中的sectPr结束当前节，下一节从新页开始（沿用模板的页面设置）
+                paragraph = body.makeelement(qn('w:p'), {})
+                paragraph_pr = paragraph.makeelement(qn('w:pPr'), {})
+                sect_pr = deepcopy(final_sect_pr)
+                for section_type in sect_pr.findall(qn('w:type')):
+                    sect_pr.remove(section_type)  # 不指定类型即为“下一页”分节
+                paragraph_pr.append(sect_pr)
+                paragraph.append(paragraph_pr)
+                final_sect_pr.addprevious(paragraph)
+
+        # 图片等绘图对象的编号在同一文档中必须唯一
+        for number, doc_pr in enumerate(merged.iter(qn('wp:docPr')), 1):
+            doc_pr.set('id', str(number))
+        return merged
+
+
+def verify_untouched_parts(template_path, output_path, document_member="word/document.xml"):
+    """
+    校验生成文件中除文档部件以外的成员与模板逐字节一致
+    :return: 不一致或缺失的成员名称列表（为空表示一致）
+    """
+    with zipfile.ZipFile(template_path) as template, zipfile.ZipFile(output_path) as output:
+        output_names = set(output.namelist())
+        mismatched = []
+        for name in template.namelist():
+            if name == document_member:
+                continue
+            if name not in output_names or template.read(name) != output.read(name):
+                mismatched.append(name)
+        if document_member not in output_names:
+            mismatched.append(document_member)
+        return mismatched
@@ -1,19 +1,11 @@
-import win32com.client as win32
-import re
 import os
 import time
-import glob
-import pythoncom
 from PyQt5.QtCore import QThread, pyqtSignal
 import sys
 import os
 from typing import List, Any
 import threading
-
-# Lazy import for openpyxl
-def get_openpyxl():
-    import openpyxl
-    return openpyxl
+from contextlib import contextmanager
 
 # Get the directory of the current script
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -24,6 +16,15 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from utils.file_utils import find_excel_file
+from utils import datasource_cache
+from utils.sheet_records import load_record_batch
+from modules.config import (
+    MAIL_BACKEND, MAIL_OUTPUT_DIR, MAIL_SMTP_HOST, MAIL_SMTP_PORT,
+    MAIL_DELIVERY, MAIL_DRAFT_FOLDER, MAIL_REVIEW_COUNT, MAIL_TEMPLATE
+)
+from modules.mail_backends import MailBackend, DELIVERY_MODES, create_backend, get_pythoncom
+from modules.email_templates import CompiledEmailTemplate, select_template
+from modules.signature_cache import SignatureCache, signature_dir, find_latest_signature, read_signature_file
 
 def get_email_addresses_from_datasource():
     """
@@ -38,10 +39,8 @@ def get_email_addresses_from_datasource():
         if not os.path.exists(datasource_path):
             raise FileNotFoundError(f"datasource.xlsx文件不存在: {datasource_path}")
 
-        # 读取Excel文件中的outlook_tocc表
-        openpyxl = get_openpyxl()
-        workbook = openpyxl.load_workbook(datasource_path, read_only=True)
-        sheet = workbook['outlook_tocc']
+        # 读取Excel文件中的outlook_tocc表（共享缓存，文件未修改时不重新打开）
+        data = datasource_cache.get_sheet_rows(datasource_path, 'outlook_tocc')
 
         # 初始化邮箱地址字典
         email_addresses = {
@@ -49,11 +48,6 @@ def get_email_addresses_from_datasource():
             'cc': []
         }
 
-        # 读取所有数据
-        data = []
-        for row in sheet.iter_rows(values_only=True):
-            data.append(list(row))
-
         # 解析表格数据 - 处理新的Excel结构
         # 新结构：列标题包含"to"和TO邮箱地址，数据行包含"cc"和CC邮箱地址
         for row_idx, row in enumerate(data):
@@ -111,9 +105,36 @@ class OutlookEmailThread(QThread):
     outlook_lock = threading.Lock()
     outlook_active = False
 
-    def __init__(self, excel_path):
+    def __init__(self, excel_path, backend=None, delivery=None, draft_folder=None, review_count=None,
+                 template_name=None):
+        """
+        :param backend: 邮件后端名称（outlook/eml/smtp）或 MailBackend 实例，默认使用 config.MAIL_BACKEND
+        :param delivery: display 逐封打开邮件窗口；drafts 直接保存为草稿（不打开窗口、不等待）
+        :param draft_folder: drafts模式下的目标文件夹（为空时保存到草稿箱）
+        :param review_count: drafts模式下保存完成后打开前N封供检查
+        :param template_name: 邮件模板名称（见 modules/email_templates.py），默认使用 config.MAIL_TEMPLATE
+        """
         super().__init__()
         self.excel_path = excel_path
+        self.backend = backend or MAIL_BACKEND
+        self.delivery = delivery or MAIL_DELIVERY
+        if self.delivery not in DELIVERY_MODES:
+            raise ValueError(f"未知的邮件处理方式：{self.delivery}（可选：{', '.join(DELIVERY_MODES)}）")
+        self.draft_folder = MAIL_DRAFT_FOLDER if draft_folder is None else draft_folder
+        self.review_count = MAIL_REVIEW_COUNT if review_count is None else review_count
+        self.template_name = template_name or MAIL_TEMPLATE
+
+    def _create_backend(self):
+        """创建邮件后端（后端日志写入本线程的进度信号）"""
+        if isinstance(self.backend, MailBackend):
+            self.backend.log = self.progress.emit
+            return self.backend
+        options = {}
+        if self.backend == "eml":
+            options = {"output_dir": MAIL_OUTPUT_DIR}
+        elif self.backend == "smtp":
+            options = {"host": MAIL_SMTP_HOST, "port": MAIL_SMTP_PORT}
+        return create_backend(self.backend, log=self.progress.emit, **options)
 
     def run(self):
         # 使用锁机制确保只有一个Outlook线程可以运行
@@ -128,10 +149,17 @@ class OutlookEmailThread(QThread):
             OutlookEmailThread.outlook_active = True
 
         try:
+            backend = self._create_backend()
+            if not backend.requires_com:
+                # 不使用Outlook的后端无需初始化COM
+                self.finished.emit(self._generate_emails_from_excel(backend))
+                return
+
             # 初始化 COM 环境（必须在操作 Outlook 前调用）
+            pythoncom = get_pythoncom()
             pythoncom.CoInitialize()
             try:
-                result = self._generate_emails_from_excel()
+                result = self._generate_emails_from_excel(backend)
                 self.finished.emit(result)
             except Exception as e:
                 # 处理 COM 注册问题
@@ -141,7 +169,7 @@ class OutlookEmailThread(QThread):
                         # 尝试重新初始化
                         pythoncom.CoUninitialize()
                         pythoncom.CoInitialize()
-                        result = self._generate_emails_from_excel()
+                        result = self._generate_emails_from_excel(backend)
                         self.finished.emit(result)
                         return
                     except Exception as retry_e:
@@ -161,149 +189,170 @@ class OutlookEmailThread(QThread):
                 OutlookEmailThread.outlook_active = False
                 self.progress.emit("Outlook任务完成，锁已释放")
 
-    def _generate_emails_from_excel(self):
-        """核心逻辑：从Excel读取数据，生成Outlook邮件"""
+    @contextmanager
+    def _timed_phase(self, name, timings):
+        """记录一个阶段的耗时（写入日志，并加入本批次的耗时汇总）"""
+        start = time.perf_counter()
         try:
-            # -------- 1. 读取Excel文件 --------
-            self.progress.emit("正在读取Excel文件...")
-            openpyxl = get_openpyxl()
-            workbook = openpyxl.load_workbook(self.excel_path, read_only=True)
-            sheet = workbook['Sheet1']
-
-            # 读取所有数据并过滤空行
-            data = []
-            for row in sheet.iter_rows(values_only=True):
-                row_list = list(row)
-                # 过滤空行：如果行中所有单元格都是None或空字符串，则跳过
-                if all(cell is None or (isinstance(cell, str) and cell.strip() == '') for cell in row_list):
-                    continue
-                data.append(row_list)
-
-            self.progress.emit(f"成功读取Excel文件，共{len(data)}行数据")
-
-            # -------- 2. 启动Outlook --------
-            self.progress.emit("启动Outlook应用程序...")
-            outlook = self._get_outlook_application()
-            if not outlook:
-                self.progress.emit("无法启动Outlook应用程序，请确保Outlook已安装且正常运行")
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            timings.append((name, elapsed))
+            self.progress.emit(f"⏱️  {name}耗时 {elapsed:.2f}秒")
+
+    def _load_records(self, columns):
+        """读取Sheet1中模板用到的列，去掉空行（整行单元格都是None或空字符串）"""
+        batch = load_record_batch(self.excel_path, columns)
+        return batch.take(batch.nonblank)
+
+    def _prepare_batch(self, backend, timings):
+        """
+        准备阶段：整批邮件共用的数据只读取一次（邮件模板、Sheet1数据行、收件人、邮件后端和签名）
+        :return: (Sheet1列式记录, TO, CC, 编译后的模板)；邮件后端无法连接时返回None
+        """
+        # -------- 0. 加载邮件模板（模板有误时在连接Outlook前报错） --------
+        template_spec = select_template(self.template_name)
+
+        # -------- 1. 读取Excel文件 --------
+        self.progress.emit("正在读取Excel文件...")
+        with self._timed_phase("读取Excel", timings):
+            data = self._load_records({spec["column"] for spec in template_spec["fields"].values()})
+        self.progress.emit(f"成功读取Excel文件，共{len(data)}行数据")
+
+        # -------- 2. 读取收件人（outlook_tocc表，整批共用） --------
+        with self._timed_phase("读取收件人", timings):
+            to_emails, cc_emails = get_email_addresses_from_datasource()
+        self.progress.emit(f"使用邮箱地址 - TO: {to_emails}, CC: {cc_emails}")
+
+        # -------- 3. 连接邮件后端 --------
+        self.progress.emit(f"连接邮件后端（{backend.name}）...")
+        with self._timed_phase("连接邮件后端", timings):
+            opened = backend.open()
+        if not opened:
+            return None
+        self.progress.emit("邮件后端已就绪")
+
+        # -------- 4. 捕获Outlook签名 --------
+        self.progress.emit("正在获取Outlook签名...")
+        with self._timed_phase("获取签名", timings):
+            signature = self._capture_outlook_signature(backend.application)
+        if not signature or len(signature) <= 50:
+            self.progress.emit("警告: 未捕获到有效签名，邮件将不含签名")
+
+        # -------- 5. 编译邮件模板（HTML外壳与签名只拼接一次） --------
+        with self._timed_phase("编译模板", timings):
+            template = CompiledEmailTemplate(template_spec, signature)
+        self.progress.emit(f"使用邮件模板：{template.name}")
+        return data, to_emails, cc_emails, template
+
+    def _generate_emails_from_excel(self, backend):
+        """核心逻辑：准备阶段读取整批共用的数据，之后每行只生成并显示邮件"""
+        timings = []
+        try:
+            prepared = self._prepare_batch(backend, timings)
+            if prepared is None:
+                if backend.requires_com:
+                    self.progress.emit("无法启动Outlook应用程序，请确保Outlook已安装且正常运行")
+                else:
+                    self.progress.emit(f"无法连接邮件后端（{backend.name}），请检查上面的错误信息")
                 return False
-            self.progress.emit("Outlook应用程序已启动")
-
-            # 检查是否已经有Outlook窗口打开
-            try:
-                import psutil
-                outlook_windows = []
-                for proc in psutil.process_iter(['name', 'pid']):
-                    if proc.info['name'] and 'outlook' in proc.info['name'].lower():
-                        outlook_windows.append(proc.info['pid'])
-
-                if len(outlook_windows) > 1:  # 当前进程 + 现有Outlook
-                    self.progress.emit(f"⚠️  检测到已有Outlook窗口打开，将使用现有Outlook实例")
-            except ImportError:
-                # psutil未安装，跳过检查
-                pass
-            except Exception as e:
-                self.progress.emit(f"检查现有Outlook窗口时出错: {str(e)}")
+            data, to_emails, cc_emails, template = prepared
 
-            # -------- 3. 捕获Outlook签名 --------
-            self.progress.emit("正在获取Outlook签名...")
-            signature = self._capture_outlook_signature(outlook)
-            if not signature or len(signature) <= 50:
-                self.progress.emit("警告: 未捕获到有效签名，邮件将不含签名")
+            # -------- 6. 批量生成邮件内容 --------
+            with self._timed_phase("生成邮件内容", timings):
+                rendered = template.render_batch(data)
 
-            # -------- 4. 循环生成邮件 --------
+            # -------- 7. 循环创建邮件 --------
             total_rows = len(data)
-            for index, row in enumerate(data):
-                self.progress.emit(f"正在处理第{index + 1}/{total_rows}行数据...")
-                try:
-                    # 提取公司名称（F列，索引2）
-                    company_full = str(row[2]) if len(row) > 2 else ""
-                    company_name = company_full.split('/')[-1].strip() if '/' in company_full else company_full.strip()
-
-                    # 提取设备信息（型号：H列索引4；SN：B列索引1）
-                    model = str(row[4]) if len(row) > 4 else ""
-                    sn = str(row[1]) if len(row) > 1 else ""
-
-                    # 提取地址和联系人（N列，索引13）
-                    contact_info = re.sub(r'\s+', ' ', str(row[13])).strip() if len(row) > 13 else ""
-
-                    # 构建邮件主题和正文
-                    subject = f"{company_name} {model} SN:{sn}包装箱回收"
-                    body = f"""Dear Mr. Zhang:
-
-如下客户请回收包装箱，麻烦尽快安排：
-客户：{company_name}
-CMM: {model} SN: {sn}
-地址及联系人：{contact_info}
-谢谢！
-
-"""
-
-                    # 创建HTML格式邮件
-                    html_body = f"""
-<html>
-<head>
-<meta http-equiv="Content-Type" content="text/html; charset=utf-8">
-<style>
-    body {{ font-family: 'Calibri', sans-serif; font-size: 11pt; }}
-    pre {{ font-family: 'Calibri', sans-serif; font-size: 11pt; }}
-</style>
-</head>
-<body>
-<pre>{body}</pre>
-<br>
-{signature if signature else ''}
-</body>
-</html>
-"""
-
-                    # 创建并显示邮件
-                    mail = outlook.CreateItem(0)
-                    mail.Subject = subject
-                    mail.HTMLBody = html_body
-
-                    # 从datasource.xlsx获取邮箱地址
-                    to_emails, cc_emails = get_email_addresses_from_datasource()
-                    self.progress.emit(f"使用邮箱地址 - TO: {to_emails}, CC: {cc_emails}")
-
-                    mail.To = to_emails
-                    mail.CC = cc_emails
-                    mail.Display()
-
-                    self.progress.emit(f"已创建邮件 #{index + 1}: {subject}")
-                    time.sleep(1)  # 给Outlook留处理时间
-
-                except Exception as e:
-                    self.progress.emit(f"处理行{index + 1}时出错: {str(e)}")
-
-            self.progress.emit("邮件创建完成！请检查Outlook窗口")
+            drafts = self.delivery == "drafts"
+            saved_subjects = []
+            review_mails = []
+            with self._timed_phase("创建邮件", timings):
+                for index, (subject, html_body) in enumerate(rendered):
+                    self.progress.emit(f"正在处理第{index + 1}/{total_rows}行数据...")
+                    try:
+                        mail = backend.create_mail(subject, html_body, to_emails, cc_emails)
+
+                        if drafts:
+                            # 直接保存，不打开窗口也不等待
+                            mail = backend.save(mail, self.draft_folder or None)
+                            saved_subjects.append(subject)
+                            if len(review_mails) < self.review_count:
+                                review_mails.append(mail)
+                            self.progress.emit(f"已保存草稿 #{index + 1}: {subject}")
+                            continue
+
+                        # 显示邮件，等待后端处理完成（代替固定等待）
+                        backend.display(mail)
+                        if not backend.wait_ready(mail):
+                            self.progress.emit(f"⚠️  邮件 #{index + 1} 在等待时间内未就绪，继续处理下一封")
+
+                        description = backend.describe(mail)
+                        self.progress.emit(f"已创建邮件 #{index + 1}: {subject}" + (f"（{description}）" if description else ""))
+
+                    except Exception as e:
+                        self.progress.emit(f"处理行{index + 1}时出错: {str(e)}")
+
+            if drafts:
+                self._report_drafts(backend, saved_subjects, review_mails, timings)
+
+            self.progress.emit("各阶段耗时：" + "，".join(f"{name} {elapsed:.2f}秒" for name, elapsed in timings))
+            if drafts:
+                self.progress.emit(f"草稿保存完成！共{len(saved_subjects)}封，位置：{backend.drafts_location(self.draft_folder or None)}")
+            elif backend.application is not None:
+                self.progress.emit("邮件创建完成！请检查Outlook窗口")
+            else:
+                self.progress.emit(f"邮件创建完成！共{backend.created}封（{backend.name}）")
             return True
 
         except Exception as e:
             self.progress.emit(f"生成邮件时出错: {str(e)}")
             return False
+        finally:
+            backend.close()
+
+    def _report_drafts(self, backend, saved_subjects, review_mails, timings):
+        """drafts模式：汇总已保存的邮件主题，并按需打开前N封供检查"""
+        location = backend.drafts_location(self.draft_folder or None)
+        self.progress.emit(f"\n📋 已保存{len(saved_subjects)}封邮件到 {location}：")
+        for number, subject in enumerate(saved_subjects, 1):
+            self.progress.emit(f"  {number}. {subject}")
+
+        if not review_mails:
+            return
+        if not backend.has_ui:
+            self.progress.emit(f"当前邮件后端（{backend.name}）没有界面，跳过打开草稿")
+            return
+        with self._timed_phase("打开草稿", timings):
+            for mail in review_mails:
+                try:
+                    backend.display(mail)
+                except Exception as e:
+                    self.progress.emit(f"打开草稿失败: {str(e)}")
+        self.progress.emit(f"已打开前{len(review_mails)}封草稿供检查")
 
     def _capture_outlook_signature(self, outlook):
-        """多方法捕获Outlook签名"""
+        """多方法捕获Outlook签名（签名未变化时使用缓存）"""
         try:
+            signature_path = signature_dir()
+            cache = SignatureCache()
+            cached, source = cache.get(signature_path)
+            if cached is not None:
+                self.progress.emit(f"签名未变化，使用缓存的签名（来源：{'签名文件' if source == 'file' else 'Outlook'}）")
+                return cached
+
             # 方法1：从默认路径读取签名文件
-            appdata = os.getenv('APPDATA')
-            signature_path = os.path.join(appdata, 'Microsoft', 'Signatures')
-            if os.path.exists(signature_path):
-                html_files = glob.glob(os.path.join(signature_path, '*.htm')) or glob.glob(os.path.join(signature_path, '*.html'))
-                if html_files:
-                    latest_file = max(html_files, key=os.path.getmtime)
-                    with open(latest_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    # 修正签名中的图片路径
-                    base_name = os.path.splitext(os.path.basename(latest_file))[0]
-                    image_folder = os.path.join(signature_path, base_name)
-                    if os.path.exists(image_folder):
-                        content = content.replace(f'"{base_name}/', f'"{image_folder}/')
-                        content = content.replace(f"'{base_name}/", f"'{image_folder}/")
-                    return content if len(content) > 50 else ""
-
-            # 方法2：通过临时邮件获取签名
+            if signature_path and os.path.exists(signature_path):
+                latest_file = find_latest_signature(signature_path)
+                if latest_file:
+                    content = read_signature_file(latest_file)
+                    signature = content if len(content) > 50 else ""
+                    self._store_signature(cache, signature_path, latest_file, signature, "file")
+                    return signature
+
+            # 方法2：通过临时邮件获取签名（需要Outlook）
+            if outlook is None:
+                return ""
             temp_mail = outlook.CreateItem(0)
             temp_mail.Display()
             time.sleep(2)
@@ -318,115 +367,60 @@ CMM: {model} SN: {sn}
             # 提取签名（通过<hr>标签分割）
             if "<hr" in signature:
                 signature = signature.split("<hr", 1)[-1].split(">", 1)[-1]
-            return signature if len(signature) > 50 else ""
+            signature = signature if len(signature) > 50 else ""
+            if signature:
+                # 探测失败（如Outlook尚未就绪）时不缓存，下次重新探测
+                self._store_signature(cache, signature_path, None, signature, "outlook")
+            return signature
 
         except Exception as e:
             self.progress.emit(f"捕获签名失败: {str(e)}")
             return ""
 
-    def _get_outlook_application(self):
-        """获取Outlook应用程序对象，包含多种COM初始化方法"""
+    def _store_signature(self, cache, signature_path, signature_file, signature, source):
+        """写入签名缓存（写入失败只影响下次运行的速度）"""
         try:
-            # 方法1：直接使用Dispatch
-            try:
-                outlook = win32.Dispatch('Outlook.Application')
-                return outlook
-            except Exception as e1:
-                self.progress.emit(f"直接Dispatch失败: {str(e1)}")
-            
-            # 方法2：使用gencache确保分发
-            try:
-                import win32com.client.gencache
-                outlook = win32com.client.gencache.EnsureDispatch('Outlook.Application')
-                self.progress.emit("使用gencache方法成功")
-                return outlook
-            except Exception as e2:
-                self.progress.emit(f"gencache方法失败: {str(e2)}")
-            
-            # 方法3：清除并重建COM缓存
-            try:
-                self.progress.emit("尝试清除损坏的COM缓存...")
-                self._clear_com_cache()
-                import win32com.client.gencache
-                outlook = win32com.client.gencache.EnsureDispatch('Outlook.Application')
-                self.progress.emit("清除缓存后成功")
-                return outlook
-            except Exception as e3:
-                self.progress.emit(f"清除缓存后仍失败: {str(e3)}")
-            
-            # 方法4：检查Outlook是否正在运行并启动
-            try:
-                import psutil
-                outlook_running = any(proc.name().lower() == 'outlook.exe' for proc in psutil.process_iter(['name']))
-                if not outlook_running:
-                    self.progress.emit("检测到Outlook未运行，尝试启动...")
-                    import subprocess
-                    subprocess.Popen(['outlook.exe'])
-                    time.sleep(10)  # 增加等待时间
-                    # 重试
-                    outlook = win32.Dispatch('Outlook.Application')
-                    return outlook
-            except ImportError:
-                self.progress.emit("无法检查Outlook进程状态（psutil未安装）")
-            except Exception as e4:
-                self.progress.emit(f"启动Outlook失败: {str(e4)}")
-            
-            # 方法5：使用CLSID直接访问
-            try:
-                outlook = win32.Dispatch('{0006F03A-0000-0000-C000-000000000046}')
-                self.progress.emit("使用CLSID方法成功")
-                return outlook
-            except Exception as e5:
-                self.progress.emit(f"CLSID方法也失败: {str(e5)}")
-            
-            # 如果所有方法都失败，提供详细指导
-            self.progress.emit("Outlook连接失败，请按以下步骤手动修复：")
-            self.progress.emit("1. 关闭所有Outlook窗口")
-            self.progress.emit("2. 按 Win+R，输入 'cmd'，运行以下命令：")
-            self.progress.emit("   cd %APPDATA%\\Python\\Pythonwin32\\gen_py")
-            self.progress.emit("   rmdir /s /q *")
-            self.progress.emit("3. 重新启动Outlook应用程序")
-            self.progress.emit("4. 重新运行此工具")
-            self.progress.emit("或者尝试：控制面板 → 程序和功能 → 修复Microsoft Office")
-            return None
-
-        except Exception as e:
-            self.progress.emit(f"获取Outlook应用程序时发生未知错误: {str(e)}")
-            return None
-
-    def _clear_com_cache(self):
-        """清除损坏的COM缓存文件"""
-        try:
-            import shutil
-            # 获取Python COM缓存目录
-            gen_py_dir = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "Python", "Pythonwin32", "gen_py")
-            
-            if os.path.exists(gen_py_dir):
-                self.progress.emit(f"正在清除COM缓存目录: {gen_py_dir}")
-                # 备份当前目录名并删除
-                backup_dir = gen_py_dir + "_backup_" + str(int(time.time()))
-                if os.path.exists(backup_dir):
-                    shutil.rmtree(backup_dir)
-                os.rename(gen_py_dir, backup_dir)
-                self.progress.emit(f"已备份旧缓存到: {backup_dir}")
-            else:
-                self.progress.emit("COM缓存目录不存在，无需清除")
-                
-        except Exception as e:
-            self.progress.emit(f"清除COM缓存时出错: {str(e)}")
-            # 即使清除失败，继续尝试其他方法
+            cache.put(signature_path, signature_file, signature, source)
+        except OSError as e:
+            self.progress.emit(f"保存签名缓存失败: {str(e)}")
 
 
 # 测试代码（直接运行该脚本时执行）
+# 无Outlook环境下可用eml后端批量生成并计时：python modules/outlook_automation.py --backend eml --output mail_out datasource.xlsx
 if __name__ == "__main__":
-    excel_path, msg = find_excel_file()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="根据datasource.xlsx批量生成包装箱回收邮件")
+    parser.add_argument("excel", nargs="?", help="Excel文件路径（默认查找桌面tool文件夹中的datasource文件）")
+    parser.add_argument("--backend", default=MAIL_BACKEND, help="邮件后端：outlook / eml / smtp")
+    parser.add_argument("--output", default=MAIL_OUTPUT_DIR, help="eml后端的输出文件夹")
+    parser.add_argument("--host", default=MAIL_SMTP_HOST, help="smtp后端的服务器地址")
+    parser.add_argument("--port", type=int, default=MAIL_SMTP_PORT, help="smtp后端的端口")
+    parser.add_argument("--template", default=MAIL_TEMPLATE, help="邮件模板名称")
+    parser.add_argument("--delivery", default=MAIL_DELIVERY, choices=DELIVERY_MODES, help="display 逐封打开窗口；drafts 直接保存为草稿")
+    parser.add_argument("--folder", default=MAIL_DRAFT_FOLDER, help="drafts模式下的目标文件夹")
+    parser.add_argument("--review", type=int, default=MAIL_REVIEW_COUNT, help="drafts模式下保存后打开前N封")
+    args = parser.parse_args()
+
+    excel_path = args.excel
     if not excel_path:
-        print(msg)
-        exit(1)
+        excel_path, msg = find_excel_file()
+        if not excel_path:
+            print(msg)
+            exit(1)
     print(f"找到Excel文件: {excel_path}")
-    # 创建并启动线程
-    thread = OutlookEmailThread(excel_path)
+
+    backend = args.backend
+    if backend == "eml":
+        backend = create_backend("eml", output_dir=args.output)
+    elif backend == "smtp":
+        backend = create_backend("smtp", host=args.host, port=args.port)
+
+    # 创建线程对象
+    thread = OutlookEmailThread(excel_path, backend=backend, delivery=args.delivery,
+                                draft_folder=args.folder, review_count=args.review, template_name=args.template)
     thread.progress.connect(print)
     thread.finished.connect(lambda success: print(f"执行完成: {success}"))
-    thread.start()
-    thread.wait()  # 等待线程结束（仅测试用）
+    start = time.perf_counter()
+    thread.run()  # 在当前线程中同步执行（没有Qt事件循环时跨线程信号不会被处理，仅测试用）
+    print(f"总耗时 {time.perf_counter() - start:.2f}秒")
@@ -0,0 +1,174 @@
+# modules/outlook_connection.py
+"""
+Outlook连接管理
+先用GetActiveObject连接正在运行的Outlook（最快，无需启动或生成COM包装）；失败时依次尝试其他连接方式。
+成功的连接方式记录在应用配置（.app_config.json）中，下次优先使用；
+连接后轮询Outlook是否可以响应（代替固定等待），每次尝试的耗时写入日志。
+"""
+import os
+import time
+
+from .config import load_app_config, save_app_config
+
+OUTLOOK_PROG_ID = 'Outlook.Application'
+OUTLOOK_CLSID = '{0006F03A-0000-0000-C000-000000000046}'
+
+CONFIG_KEY = "outlook_connect_strategy"
+READY_TIMEOUT = 30.0       # 等待Outlook可以响应的最长时间（秒），新启动的Outlook需要加载邮箱
+READY_POLL_INTERVAL = 0.5  # 检查Outlook是否可以响应的间隔（秒）
+
+# 连接方式（按默认尝试顺序）
+STRATEGY_LABELS = {
+    "active": "连接正在运行的Outlook",
+    "dispatch": "Dispatch",
+    "gencache": "gencache",
+    "gencache_rebuild": "清除COM缓存后gencache",
+    "launch": "启动outlook.exe",
+    "clsid": "CLSID",
+}
+DEFAULT_ORDER = tuple(STRATEGY_LABELS)
+
+
+# Lazy import for win32com（非Windows环境或不使用Outlook时无需安装）
+def get_win32com():
+    import win32com.client as win32
+    return win32
+
+
+def load_cached_strategy(config_path=None):
+    """读取应用配置中记录的连接方式"""
+    strategy = load_app_config(config_path).get(CONFIG_KEY)
+    return strategy if strategy in STRATEGY_LABELS else None
+
+
+def save_cached_strategy(strategy, config_path=None):
+    """把连接方式写入应用配置（保留配置中的其他项）"""
+    config = load_app_config(config_path)
+    if config.get(CONFIG_KEY) == strategy:
+        return
+    config[CONFIG_KEY] = strategy
+    save_app_config(config, config_path)
+
+
+class OutlookConnector:
+    """按顺序尝试各连接方式，返回可以响应的Outlook应用对象"""
+
+    def __init__(self, log=None, config_path=None, ready_timeout=READY_TIMEOUT):
+        self.log = log or (lambda message: None)
+        self.config_path = config_path
+        self.ready_timeout = ready_timeout
+        self.strategy = None  # 本次成功的连接方式
+
+    def strategy_order(self):
+        """先连接正在运行的实例，其次是上次成功的方式，最后是其余方式"""
+        cached = load_cached_strategy(self.config_path)
+        if cached == "gencache_rebuild":
+            cached = "gencache"  # COM缓存已经重建过，不再重复清除
+        order = ["active"]
+        if cached and cached not in order:
+            order.append(cached)
+        order.extend(strategy for strategy in DEFAULT_ORDER if strategy not in order)
+        return order
+
+    def connect(self):
+        """
+        :return: Outlook应用对象；所有方式都失败时返回None
+        """
+        for strategy in self.strategy_order():
+            label = STRATEGY_LABELS[strategy]
+            start = time.perf_counter()
+            try:
+                outlook = self._attempt(strategy)
+            except Exception as e:
+                self.log(f"连接方式[{label}]失败，耗时{time.perf_counter() - start:.2f}秒: {str(e)}")
+                continue
+            try:
+                self._wait_ready(outlook)
+            except TimeoutError as e:
+                # 已连接到Outlook但一直无响应（如有弹出对话框），其他连接方式得到的也是同一个实例，不再继续尝试
+                self.log(f"连接方式[{label}]已连接但Outlook无响应，耗时{time.perf_counter() - start:.2f}秒: {str(e)}")
+                self.log("请检查Outlook是否有未关闭的对话框（如配置文件选择、登录窗口）后重试")
+                return None
+            self.log(f"连接方式[{label}]成功，耗时{time.perf_counter() - start:.2f}秒")
+            self.strategy = strategy
+            if strategy != "active":
+                # 正在运行的实例每次都会先尝试，只记录需要其他方式时的结果
+                self._remember("gencache" if strategy == "gencache_rebuild" else strategy)
+            return outlook
+
+        self._log_manual_fix()
+        return None
+
+    def _remember(self, strategy):
+        try:
+            save_cached_strategy(strategy, self.config_path)
+        except OSError as e:
+            self.log(f"保存Outlook连接方式失败: {str(e)}")
+
+    def _attempt(self, strategy):
+        win32 = get_win32com()
+        if strategy == "active":
+            # Outlook未运行时抛出异常（操作不可用）
+            return win32.GetActiveObject(OUTLOOK_PROG_ID)
+        if strategy == "dispatch":
+            return win32.Dispatch(OUTLOOK_PROG_ID)
+        if strategy in ("gencache", "gencache_rebuild"):
+            if strategy == "gencache_rebuild":
+                self._clear_com_cache()
+            import win32com.client.gencache
+            return win32com.client.gencache.EnsureDispatch(OUTLOOK_PROG_ID)
+        if strategy == "launch":
+            import subprocess
+            subprocess.Popen(['outlook.exe'])
+            return self._poll(lambda: win32.GetActiveObject(OUTLOOK_PROG_ID), "Outlook进程启动后仍无法连接")
+        if strategy == "clsid":
+            return win32.Dispatch(OUTLOOK_CLSID)
+        raise ValueError(f"未知的连接方式：{strategy}")
+
+    def _wait_ready(self, outlook):
+        """轮询直到Outlook可以响应（能取得MAPI命名空间），代替固定等待"""
+        self._poll(lambda: outlook.GetNamespace("MAPI"), "Outlook在等待时间内未就绪")
+
+    def _poll(self, probe, timeout_message):
+        """反复调用probe直到成功；Outlook启动过程中COM调用会被拒绝，超时后抛出最后一次的错误"""
+        deadline = time.perf_counter() + self.ready_timeout
+        while True:
+            try:
+                return probe()
+            except Exception as e:
+                if time.perf_counter() >= deadline:
+                    raise TimeoutError(f"{timeout_message}（{self.ready_timeout:.0f}秒）: {str(e)}") from e
+            time.sleep(READY_POLL_INTERVAL)
+
+    def _clear_com_cache(self):
+        """清除损坏的COM缓存文件"""
+        try:
+            import shutil
+            # 获取Python COM缓存目录
+            gen_py_dir = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "Python", "Pythonwin32", "gen_py")
+
+            if os.path.exists(gen_py_dir):
+                self.log(f"正在清除COM缓存目录: {gen_py_dir}")
+                # 备份当前目录名并删除
+                backup_dir = gen_py_dir + "_backup_" + str(int(time.time()))
+                if os.path.exists(backup_dir):
+                    shutil.rmtree(backup_dir)
+                os.rename(gen_py_dir, backup_dir)
+                self.log(f"已备份旧缓存到: {backup_dir}")
+            else:
+                self.log("COM缓存目录不存在，无需清除")
+
+        except Exception as e:
+            self.log(f"清除COM缓存时出错: {str(e)}")
+            # 即使清除失败，继续尝试其他方法
+
+    def _log_manual_fix(self):
+        """所有方法都失败时提供详细指导"""
+        self.log("Outlook连接失败，请按以下步骤手动修复：")
+        self.log("1. 关闭所有Outlook窗口")
+        self.log("2. 按 Win+R，输入 'cmd'，运行以下命令：")
+        self.log("   cd %APPDATA%\\Python\\Pythonwin32\\gen_py")
+        self.log("   rmdir /s /q *")
+        self.log("3. 重新启动Outlook应用程序")
+        self.log("4. 重新运行此工具")
+        self.log("或者尝试：控制面板 → 程序和功能 → 修复Microsoft Office")
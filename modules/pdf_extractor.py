@@ -1,12 +1,143 @@
 # modules/pdf_extractor.py
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 import pdfplumber
+from pdfplumber.page import Page
+from pdfminer.pdfpage import PDFPage
 from PyQt5.QtCore import QObject, pyqtSignal
 import sys  # 用于独立运行时的命令行交互
 
+# 独立运行时把项目根目录加入Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from modules.pdf_manifest import ExtractManifest
+from modules.pdf_profiles import DEFAULT_PROFILE, load_profiles, select_profile, profiles_signature
+
+# 提取逻辑版本（与提取配置摘要一起写入增量清单；修改提取逻辑时一并修改，使旧清单失效）
+EXTRACTOR_VERSION = 2
+RSS_SAMPLE_INTERVAL = 0.05  # 提取期间采样进程内存的间隔（秒）；过密的采样会与提取线程争用GIL
+
+
+def extract_measured_values(pdf_path, profile=None):
+    """
+    按提取配置提取单个PDF中目标表格的指定列数据（默认：第三页表格的“实测值”列）
+    只分析配置指定的页（可裁剪到表格区域），找到表头含关键字的表格后即停止。
+    定义在模块级别，以便在进程池的子进程中执行（参数与返回值均可pickle）
+    :param profile: 提取配置字典（见 modules.pdf_profiles），None时使用内置配置
+    :return: (数据文本或None, 说明信息)
+    """
+    profile = profile or DEFAULT_PROFILE
+    page_no = profile["page_index"] + 1
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            page = _open_page(pdf, page_no)
+            if page is None:
+                return None, f"页数不足{page_no}页（需至少{page_no}页，从第{page_no}页提取表格）"
+            try:
+                return _extract_from_page(page, profile)
+            finally:
+                # 释放页面解析缓存（字符、线条等版面对象）
+                page.close()
+                pdf.flush_cache()
+
+    except Exception as e:
+        return None, f"提取失败：{str(e)}"
+
+
+def _open_page(pdf, page_no):
+    """
+    按页序惰性遍历页树，只为目标页创建页面对象（不访问pdf.pages，避免为所有页构建页面对象）
+    :return: pdfplumber页面对象；页数不足时返回None
+    """
+    for number, pdf_page in enumerate(PDFPage.create_pages(pdf.doc), 1):
+        if number == page_no:
+            return Page(pdf, pdf_page, page_number=number)
+    return None
+
+
+def extract_with_stats(pdf_path, profile=None):
+    """
+    提取单个PDF，提取期间在后台线程中采样当前进程的RSS
+    （进程池中的子进程会依次处理多个文件，进程累计峰值不能反映单个文件，因此只统计本次提取期间）
+    :return: (数据文本或None, 说明信息, 提取期间RSS峰值相对提取前的增量MB；未安装psutil时为None)
+    """
+    try:
+        import psutil
+    except ImportError:
+        data, msg = extract_measured_values(pdf_path, profile)
+        return data, msg, None
+
+    process = psutil.Process()
+    start_rss = peak_rss = process.memory_info().rss
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak_rss
+        while not done.wait(RSS_SAMPLE_INTERVAL):
+            peak_rss = max(peak_rss, process.memory_info().rss)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        data, msg = extract_measured_values(pdf_path, profile)
+    finally:
+        done.set()
+        sampler.join()
+    peak_rss = max(peak_rss, process.memory_info().rss)
+    return data, msg, (peak_rss - start_rss) / (1024 * 1024)
+
+
+def _extract_from_page(page, profile):
+    """在目标页上查找表头含关键字的表格并提取对应列"""
+    page_no = profile["page_index"] + 1
+    keyword = profile["header_keyword"]
+    # 指定了区域时裁剪到表格区域，减少版面分析的字符和线条
+    if profile["bbox"]:
+        x0, top, x1, bottom = profile["bbox"]
+        page = page.crop((x0, top, min(x1, page.width), min(bottom, page.height)))
+    found_tables = page.find_tables(table_settings=profile["table_settings"] or {})
+    if not found_tables:
+        return None, f"未找到表格（第{page_no}页无表格数据）"
+
+    # 逐个提取表格文本，找到表头含关键字的表格后停止
+    table = None
+    target_col_indices = []
+    for found_table in found_tables:
+        rows = found_table.extract()
+        if not rows:
+            continue
+        # 查找所有包含关键字的列索引
+        target_col_indices = [
+            i for i, cell in enumerate(rows[0])
+            if keyword in str(cell)  # 匹配“实测值”相关列
+        ]
+        if target_col_indices:
+            table = rows
+            break
+    if table is None:
+        return None, f"未找到'{keyword}'列（表头无匹配字段）"
+
+    # 按列提取数据（忽略第一行表头）
+    merged_data = []
+    for col_idx in target_col_indices:
+        for row_idx, row in enumerate(table):
+            if row_idx > 0 and len(row) > col_idx:  # 跳过表头，确保列存在
+                cell_data = str(row[col_idx]).strip()
+                if cell_data:  # 过滤空值
+                    merged_data.append(cell_data)
+
+    if not merged_data:
+        return None, f"未提取到有效数据（'{keyword}'列无内容）"
+
+    # 返回合并后的数据（按行拼接）
+    return "\n".join(merged_data), "提取成功"
+
 
 class PdfTableExtractor(QObject):
-    """PDF表格提取器：提取第三页表格的“实测值”列，生成TXT文件"""
+    """PDF表格提取器：按提取配置提取证书表格中的目标列（默认第三页表格的“实测值”列），生成TXT文件"""
     log_signal = pyqtSignal(str)  # 传递日志到主窗口
     progress_signal = pyqtSignal(int)  # 传递进度（0-100）
     finished_signal = pyqtSignal(bool)  # 任务完成信号（成功/失败）
@@ -14,12 +145,24 @@ class PdfTableExtractor(QObject):
     # -------------------------- 核心修改：固定输入路径 --------------------------
     DEFAULT_INPUT_DIR = r"H:\Shanghai\IMT\Service\Management Tools\量具\标准器校准证书最新\02步距规"
     DEFAULT_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "Desktop", "tool")
-
-    def __init__(self, input_dir=None, output_dir=None):
+    # 并行提取的默认进程数（保留一个核心给界面）；设为1时逐个提取
+    DEFAULT_MAX_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+    CANCEL_POLL_INTERVAL = 0.2  # 等待子进程结果时检查取消标记的间隔（秒）
+
+    def __init__(self, input_dir=None, output_dir=None, max_workers=None, incremental=True):
+        """
+        :param max_workers: 并行提取的进程数（1为逐个提取）
+        :param incremental: 是否增量提取（根据输出文件夹中的清单跳过未变化的证书）
+        """
         super().__init__()
         # 优先使用传入路径，无传入则用默认路径（input_dir固定为DEFAULT_INPUT_DIR）
         self.input_dir = input_dir if input_dir else self.DEFAULT_INPUT_DIR
         self.output_dir = output_dir if output_dir else self.DEFAULT_OUTPUT_DIR
+        self.max_workers = max(1, max_workers or self.DEFAULT_MAX_WORKERS)
+        self.incremental = incremental
+        self.profiles = None  # 提取配置列表（见 modules.pdf_profiles）
+        self.manifest = None
+        self._fingerprints = {}  # 本次需要提取的文件 -> 文件指纹（写入清单）
         self.is_canceled = False  # 取消标记
 
     def set_paths(self, input_dir=None, output_dir=None):
@@ -39,52 +182,145 @@ class PdfTableExtractor(QObject):
 
     def _extract_single_pdf(self, pdf_path):
         """提取单个PDF的“实测值”列数据（核心逻辑不变）"""
-        try:
+        if self.is_canceled:
+            return None, "任务已取消", None
+        return extract_with_stats(pdf_path, self._profile_for(os.path.basename(pdf_path)))
+
+    def _profile_for(self, filename):
+        """按文件名选择提取配置"""
+        if self.profiles is None:
+            self.profiles = load_profiles()
+        return select_profile(self.profiles, filename)
+
+    def _save_result(self, idx, total_files, filename, data, msg, peak_mb=None):
+        """输出单个文件的处理日志与进度，提取成功时生成TXT文件，返回是否成功"""
+        # 计算当前进度（百分比）
+        progress = int((idx / total_files) * 100)
+        self.progress_signal.emit(progress)
+        self.log_signal.emit(f"\n🔄 正在处理（{idx}/{total_files}）：{filename}")
+        if peak_mb is not None:
+            self.log_signal.emit(f"📉 提取期间内存峰值增量：{peak_mb:.1f} MB")
+
+        if self.manifest is not None and filename in self._fingerprints:
+            self.manifest.record(filename, self._fingerprints[filename], data or None, msg)
+
+        if data:
+            # 提取成功：生成TXT文件
+            txt_filename = self._write_txt(filename, data)
+            self.log_signal.emit(f"✅ 处理成功：{txt_filename}（已保存到输出文件夹）")
+            return True
+        # 提取失败：记录错误原因
+        self.log_signal.emit(f"❌ 处理失败：{filename} - {msg}")
+        return False
+
+    def _write_txt(self, filename, data):
+        """把提取的数据写入与PDF同名的TXT文件，返回TXT文件名"""
+        txt_filename = os.path.splitext(filename)[0] + ".txt"
+        txt_path = os.path.join(self.output_dir, txt_filename)
+        with open(txt_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        return txt_filename
+
+    def _plan_incremental(self, pdf_files):
+        """
+        根据清单把文件分为新增/变化/未变化，返回 (需要提取的文件列表, 各状态计数)
+        未变化但TXT文件丢失的证书直接用清单中保存的数据恢复，不重新解析PDF
+        """
+        extractor_key = f"v{EXTRACTOR_VERSION}:{profiles_signature(self.profiles)}"
+        self.manifest = ExtractManifest(self.output_dir, extractor_key)
+        counts = {"new": 0, "changed": 0, "retry": 0, "unchanged": 0, "removed": 0}
+        to_extract = []
+        for filename in pdf_files:
+            pdf_path = os.path.join(self.input_dir, filename)
+            status, fingerprint = self.manifest.classify(filename, pdf_path, os.stat(pdf_path))
+            counts[status] += 1
+            if status != "unchanged":
+                self._fingerprints[filename] = fingerprint
+                to_extract.append(filename)
+                continue
+            payload = self.manifest.files[filename].get("payload")
+            txt_path = os.path.join(self.output_dir, os.path.splitext(filename)[0] + ".txt")
+            if payload and not os.path.exists(txt_path):
+                self._write_txt(filename, payload)
+                self.log_signal.emit(f"♻️  未变化，已从清单恢复TXT：{os.path.basename(txt_path)}")
+        counts["removed"] = len(self.manifest.remove_missing(set(pdf_files)))
+        return to_extract, counts
+
+    def _extract_sequential(self, pdf_files):
+        """在当前线程中逐个提取，返回成功数量（任务取消时返回None）"""
+        total_files = len(pdf_files)
+        success_count = 0
+        for idx, filename in enumerate(pdf_files, 1):
             if self.is_canceled:
-                return None, "任务已取消"
-
-            # 打开PDF并检查页数
-            with pdfplumber.open(pdf_path) as pdf:
-                if len(pdf.pages) < 3:
-                    return None, "页数不足3页（需至少3页，从第3页提取表格）"
-
-                # 提取第三页表格（索引2 = 第3页）
-                page = pdf.pages[2]
-                tables = page.extract_tables()
-                if not tables:
-                    return None, "未找到表格（第三页无表格数据）"
-
-                # 处理第一个表格（默认目标表格）
-                table = tables[0]
-                if len(table) == 0:
-                    return None, "表格为空（第三页表格无数据）"
-
-                # 查找所有包含“实测值”的列索引
-                header_row = table[0]
-                target_col_indices = [
-                    i for i, cell in enumerate(header_row)
-                    if "实测值" in str(cell)  # 匹配“实测值”相关列
-                ]
-                if not target_col_indices:
-                    return None, "未找到'实测值'列（表头无匹配字段）"
-
-                # 按列提取数据（忽略第一行表头）
-                merged_data = []
-                for col_idx in target_col_indices:
-                    for row_idx, row in enumerate(table):
-                        if row_idx > 0 and len(row) > col_idx:  # 跳过表头，确保列存在
-                            cell_data = str(row[col_idx]).strip()
-                            if cell_data:  # 过滤空值
-                                merged_data.append(cell_data)
-
-                if not merged_data:
-                    return None, "未提取到有效数据（'实测值'列无内容）"
-
-                # 返回合并后的“实测值”数据（按行拼接）
-                return "\n".join(merged_data), "提取成功"
+                self.log_signal.emit(f"❌ 任务取消，已处理{idx - 1}/{total_files}个文件")
+                return None
+            pdf_path = os.path.join(self.input_dir, filename)
+            data, msg, peak_mb = self._extract_single_pdf(pdf_path)
+            if self._save_result(idx, total_files, filename, data, msg, peak_mb):
+                success_count += 1
+        return success_count
+
+    def _extract_parallel(self, pdf_files):
+        """
+        使用进程池并行提取（pdfplumber版面分析是纯Python的CPU密集计算），返回成功数量（任务取消时返回None）
+        结果按文件顺序依次处理，日志和进度与逐个提取时一致
+        """
+        total_files = len(pdf_files)
+        workers = min(self.max_workers, total_files)
+        self.log_signal.emit(f"⚙️  并行提取：{workers}个进程")
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError) as e:
+            self.log_signal.emit(f"⚠️  无法启动进程池（{e}），改为逐个提取")
+            return self._extract_sequential(pdf_files)
 
-        except Exception as e:
-            return None, f"提取失败：{str(e)}"
+        success_count = 0
+        processed = 0
+        try:
+            futures = [
+                executor.submit(
+                    extract_with_stats, os.path.join(self.input_dir, filename), self._profile_for(filename)
+                )
+                for filename in pdf_files
+            ]
+            for idx, (filename, future) in enumerate(zip(pdf_files, futures), 1):
+                while True:
+                    if self.is_canceled:
+                        self.log_signal.emit(f"❌ 任务取消，已处理{processed}/{total_files}个文件")
+                        return None
+                    try:
+                        data, msg, peak_mb = future.result(timeout=self.CANCEL_POLL_INTERVAL)
+                        break
+                    except FutureTimeoutError:
+                        continue
+                    except Exception as e:
+                        # 子进程异常退出等情况：记为该文件失败
+                        data, msg, peak_mb = None, f"提取失败：{str(e)}", None
+                        break
+                if self._save_result(idx, total_files, filename, data, msg, peak_mb):
+                    success_count += 1
+                processed = idx
+        finally:
+            if self.is_canceled:
+                self._terminate_pool(executor)
+            else:
+                executor.shutdown(wait=True)
+        return success_count
+
+    def _terminate_pool(self, executor):
+        """取消时丢弃尚未开始的任务并结束正在解析PDF的子进程（结果已不再需要），避免子进程在后台继续运行"""
+        terminate_workers = getattr(executor, "terminate_workers", None)  # Python 3.14+
+        if terminate_workers is not None:
+            terminate_workers()
+            return
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(timeout=self.CANCEL_POLL_INTERVAL * 5)
+        self.log_signal.emit(f"⏹️  已结束{len(processes)}个提取进程")
 
     def batch_extract(self):
         """批量处理输入文件夹中的所有PDF（核心逻辑不变）"""
@@ -114,42 +350,48 @@ class PdfTableExtractor(QObject):
                 self.finished_signal.emit(True)  # 无文件也算“任务完成”
                 return
 
+            # 加载提取配置（pdf_profiles.json中的自定义版式 + 内置步距规配置）
+            self.profiles = load_profiles()
+            if len(self.profiles) > 1:
+                names = "、".join(profile["name"] for profile in self.profiles)
+                self.log_signal.emit(f"📐 提取配置：{names}")
+
+            # 4. 增量提取：跳过清单中记录的未变化证书
+            counts = None
+            if self.incremental:
+                pdf_files, counts = self._plan_incremental(pdf_files)
+                self.log_signal.emit(
+                    f"🗂️  增量检查：新增{counts['new']}个，变化{counts['changed']}个，重试上次失败{counts['retry']}个，"
+                    f"未变化{counts['unchanged']}个（跳过），已移除{counts['removed']}个"
+                )
+
             total_files = len(pdf_files)
-            self.log_signal.emit(f"📊 开始批量处理PDF：共{total_files}个文件")
-
-            # 4. 批量处理每个PDF（带进度计算）
-            success_count = 0
-            for idx, filename in enumerate(pdf_files, 1):
-                if self.is_canceled:
-                    self.log_signal.emit(f"❌ 任务取消，已处理{idx - 1}/{total_files}个文件")
-                    self.finished_signal.emit(False)
-                    return
-
-                # 计算当前进度（百分比）
-                progress = int((idx / total_files) * 100)
-                self.progress_signal.emit(progress)
-
-                # 处理单个PDF
-                pdf_path = os.path.join(self.input_dir, filename)
-                self.log_signal.emit(f"\n🔄 正在处理（{idx}/{total_files}）：{filename}")
-
-                data, msg = self._extract_single_pdf(pdf_path)
-                if data:
-                    # 提取成功：生成TXT文件
-                    txt_filename = os.path.splitext(filename)[0] + ".txt"
-                    txt_path = os.path.join(self.output_dir, txt_filename)
-                    with open(txt_path, "w", encoding="utf-8") as f:
-                        f.write(data)
-                    success_count += 1
-                    self.log_signal.emit(f"✅ 处理成功：{txt_filename}（已保存到输出文件夹）")
+            if total_files:
+                self.log_signal.emit(f"📊 开始批量处理PDF：共{total_files}个文件")
+
+            # 5. 批量处理每个PDF（带进度计算）：多个文件时使用进程池并行提取，日志仍按文件顺序输出
+            try:
+                if self.max_workers > 1 and total_files > 1:
+                    success_count = self._extract_parallel(pdf_files)
                 else:
-                    # 提取失败：记录错误原因
-                    self.log_signal.emit(f"❌ 处理失败：{filename} - {msg}")
+                    success_count = self._extract_sequential(pdf_files)
+            finally:
+                # 取消时也保存已完成部分，下次只需提取剩余文件
+                if self.manifest is not None:
+                    self.manifest.save()
+            if success_count is None:
+                self.finished_signal.emit(False)
+                return
 
-            # 5. 任务完成：汇总结果
+            # 6. 任务完成：汇总结果
             self.log_signal.emit(f"\n🎉 批量处理完成！")
+            if counts is not None:
+                self.log_signal.emit(
+                    f"📈 文件统计：新增{counts['new']}个，变化{counts['changed']}个，重试上次失败{counts['retry']}个，"
+                    f"未变化{counts['unchanged']}个，已移除{counts['removed']}个"
+                )
             self.log_signal.emit(
-                f"📈 处理统计：共{total_files}个文件，成功{success_count}个，失败{total_files - success_count}个")
+                f"📈 处理统计：共提取{total_files}个文件，成功{success_count}个，失败{total_files - success_count}个")
             self.log_signal.emit(f"📁 TXT文件保存路径：{self.output_dir}")
             self.progress_signal.emit(100)  # 进度条拉满
             self.finished_signal.emit(True)
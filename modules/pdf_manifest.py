@@ -0,0 +1,96 @@
+# modules/pdf_manifest.py
+"""
+PDF提取清单
+保存在TXT输出文件夹中，记录每个证书的源路径、大小、修改时间、内容哈希和提取出的“实测值”数据。
+再次提取时未变化的证书直接跳过（不重新解析PDF，也不重写TXT）。
+"""
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = ".pdf_extract_manifest.json"
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path):
+    """分块计算文件的SHA-256（避免一次读入整个文件）"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractManifest:
+    """
+    增量提取清单
+    files: {PDF文件名: {"source", "size", "mtime_ns", "sha256", "payload", "message"}}
+    payload 为提取出的数据（提取失败时为None，message记录失败原因；下次提取时重新尝试）
+    """
+
+    def __init__(self, output_dir, extractor_key=""):
+        """
+        :param extractor_key: 提取规则标识；与清单中记录的不一致时（如提取规则已修改）全部重新提取
+        """
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.extractor_key = extractor_key
+        self.files = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # 清单损坏时视为首次提取
+            return
+        if data.get("version") == MANIFEST_VERSION and data.get("extractor") == self.extractor_key:
+            self.files = data.get("files", {})
+
+    def classify(self, filename, pdf_path, stat_result):
+        """
+        判断文件状态：大小和修改时间均未变时直接视为未变化；否则计算哈希确认内容是否真的变化
+        上次提取失败（没有payload）的文件无论是否变化都重新提取
+        :return: ("new" | "changed" | "retry" | "unchanged", 文件指纹字典)
+        """
+        entry = self.files.get(filename)
+        fingerprint = {"source": pdf_path, "size": stat_result.st_size, "mtime_ns": stat_result.st_mtime_ns}
+        if entry is not None and not entry.get("payload"):
+            fingerprint["sha256"] = file_sha256(pdf_path)
+            return "retry", fingerprint
+        if entry and all(entry.get(key) == value for key, value in fingerprint.items()):
+            fingerprint["sha256"] = entry.get("sha256")
+            return "unchanged", fingerprint
+
+        fingerprint["sha256"] = file_sha256(pdf_path)
+        if entry is None:
+            return "new", fingerprint
+        if entry.get("sha256") == fingerprint["sha256"]:
+            # 只是修改时间变化（如重新复制到网络盘），内容相同：更新记录即可
+            entry.update(fingerprint)
+            return "unchanged", fingerprint
+        return "changed", fingerprint
+
+    def record(self, filename, fingerprint, payload, message):
+        """记录一个文件的提取结果"""
+        self.files[filename] = dict(fingerprint, payload=payload, message=message)
+
+    def remove_missing(self, present_names):
+        """删除源文件夹中已不存在的记录，返回被删除的文件名列表"""
+        removed = [name for name in self.files if name not in present_names]
+        for name in removed:
+            del self.files[name]
+        return removed
+
+    def save(self):
+        """写入清单（先写临时文件再替换，避免中途中断留下损坏的清单）"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "extractor": self.extractor_key, "files": self.files},
+                f, ensure_ascii=False, indent=1
+            )
+        os.replace(tmp_path, self.path)
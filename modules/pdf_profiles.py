@@ -0,0 +1,88 @@
+# modules/pdf_profiles.py
+"""
+PDF表格提取配置（提取规则注册表）
+每个配置描述一种证书版式：表格所在页、可选的裁剪区域、目标列的表头关键字和pdfplumber表格识别参数。
+除内置的步距规配置外，可在程序目录的 pdf_profiles.json 中添加其他版式（如其他量具的证书），无需修改代码：
+
+    [
+        {
+            "name": "环规",
+            "match": ["*环规*.pdf"],
+            "page_index": 1,
+            "bbox": [0, 300, 595, 800],
+            "header_keyword": "测量值",
+            "table_settings": {"vertical_strategy": "lines", "horizontal_strategy": "lines"}
+        }
+    ]
+
+match 为文件名通配符（不区分大小写），按顺序使用第一个匹配的配置；bbox 为 [x0, top, x1, bottom]（单位pt，原点在页面左上角）。
+"""
+import fnmatch
+import hashlib
+import json
+import os
+
+from .config import PDF_PROFILES_PATH
+
+# 内置配置：步距规证书，第三页表格中表头含“实测值”的列
+DEFAULT_PROFILE = {
+    "name": "步距规",
+    "match": ["*"],
+    "page_index": 2,
+    "bbox": None,
+    "header_keyword": "实测值",
+    "table_settings": {},
+}
+
+PROFILE_KEYS = set(DEFAULT_PROFILE)
+
+
+def _normalize(profile):
+    """补全缺省字段并校验配置"""
+    unknown = set(profile) - PROFILE_KEYS
+    if unknown:
+        raise ValueError(f"提取配置 {profile.get('name', '?')} 含未知字段：{', '.join(sorted(unknown))}")
+    normalized = dict(DEFAULT_PROFILE, **profile)
+    if isinstance(normalized["match"], str):
+        normalized["match"] = [normalized["match"]]
+    normalized["match"] = [pattern.lower() for pattern in normalized["match"]]
+    if not isinstance(normalized["page_index"], int) or normalized["page_index"] < 0:
+        raise ValueError(f"提取配置 {normalized['name']} 的page_index必须是非负整数")
+    bbox = normalized["bbox"]
+    if bbox is not None:
+        if len(bbox) != 4 or bbox[0] >= bbox[2] or bbox[1] >= bbox[3]:
+            raise ValueError(f"提取配置 {normalized['name']} 的bbox必须是 [x0, top, x1, bottom]")
+        normalized["bbox"] = [float(value) for value in bbox]
+    return normalized
+
+
+def load_profiles(path=None):
+    """
+    加载提取配置：pdf_profiles.json 中的配置优先，内置配置排在最后作为兜底
+    :return: 配置列表（字典，可直接传给子进程）
+    """
+    path = path or PDF_PROFILES_PATH
+    profiles = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [data]
+        profiles = [_normalize(profile) for profile in data]
+    profiles.append(_normalize(DEFAULT_PROFILE))
+    return profiles
+
+
+def select_profile(profiles, filename):
+    """按文件名选择第一个匹配的配置"""
+    name = filename.lower()
+    for profile in profiles:
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in profile["match"]):
+            return profile
+    return profiles[-1]
+
+
+def profiles_signature(profiles):
+    """配置内容的摘要（写入增量清单，配置修改后旧的提取结果全部失效）"""
+    raw = json.dumps(profiles, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:12]
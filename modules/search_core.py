@@ -0,0 +1,226 @@
+# modules/search_core.py
+"""
+文件内容搜索核心
+每个文件只以字节形式读取一次（大文件使用mmap），把搜索内容预先编码为各候选编码后
+直接在字节层面匹配，只对命中的那一行进行解码校验（命中行含非ASCII字节时才确定整个文件的编码），
+行号与按文本逐行读取时一致。
+"""
+import mmap
+import re
+from contextlib import contextmanager
+
+# 与原搜索逻辑一致的候选编码（按顺序尝试）
+ENCODINGS = ['utf-8', 'gb18030', 'gbk', 'latin-1']
+
+# 超过该大小的文件使用mmap读取，避免整文件复制到内存
+MMAP_THRESHOLD = 1024 * 1024
+
+
+def decode_content(raw):
+    """按候选编码顺序在内存中解码文件内容，返回 (文本, 编码)"""
+    for encoding in ENCODINGS:
+        try:
+            return raw.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    # latin-1 可解码任意字节，理论上不会走到这里
+    return raw.decode('latin-1', errors='replace'), 'latin-1'
+
+
+def split_lines(text):
+    """按文本模式读取文件的规则拆分行（\\r\\n、\\r 均视为换行）"""
+    return text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+
+@contextmanager
+def open_file_bytes(file_path):
+    """以字节形式打开文件：小文件一次读入，大文件使用只读mmap"""
+    with open(file_path, 'rb') as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        if size < MMAP_THRESHOLD:
+            yield f.read()
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def _line_bounds(data, start, end):
+    """返回匹配位置所在行的起止偏移（\\n 与 \\r 均视为行分隔符）"""
+    line_start = max(data.rfind(b'\n', 0, start), data.rfind(b'\r', 0, start)) + 1
+    line_end = len(data)
+    for sep in (b'\n', b'\r'):
+        pos = data.find(sep, end)
+        if pos != -1 and pos < line_end:
+            line_end = pos
+    return line_start, line_end
+
+
+def _line_number(data, line_start):
+    """计算行号（与文本模式的通用换行规则一致：\\r\\n、\\r、\\n 各算一个换行）"""
+    prefix = bytes(data[:line_start])
+    return prefix.count(b'\n') + prefix.count(b'\r') - prefix.count(b'\r\n') + 1
+
+
+class ByteNeedle:
+    """把搜索内容编码为各候选编码下的字节模式，用于字节级匹配"""
+
+    def __init__(self, search_content, case_sensitive=False):
+        self.search_content = search_content
+        self.case_sensitive = case_sensitive
+        self.text_needle = search_content if case_sensitive else search_content.lower()
+        # 字节模式的忽略大小写只对ASCII字母生效；含非ASCII大小写字母时改为解码后匹配
+        self.byte_exact = case_sensitive or all(
+            ord(ch) < 128 or ch.lower() == ch.upper() for ch in search_content
+        )
+
+        # 相同字节序列的编码合并为一个模式（如纯ASCII内容在所有编码下都相同）
+        flags = 0 if case_sensitive else re.IGNORECASE
+        grouped = {}
+        for encoding in ENCODINGS:
+            try:
+                grouped.setdefault(search_content.encode(encoding), encoding)
+            except UnicodeEncodeError:
+                continue
+        self.patterns = [re.compile(re.escape(encoded), flags) for encoded in grouped]
+
+    def _verify_line(self, line_bytes, file_encoding):
+        """解码命中行并确认确实包含搜索内容，返回行文本或None"""
+        line = line_bytes.decode(file_encoding, errors='replace')
+        line_to_check = line if self.case_sensitive else line.lower()
+        if self.text_needle in line_to_check:
+            return line
+        return None
+
+    def find_first(self, data):
+        """
+        在字节数据中查找第一条匹配行
+        :return: (行号, 行文本) 或 None
+        """
+        if not self.byte_exact:
+            text, _ = decode_content(bytes(data))
+            for line_num, line in enumerate(split_lines(text), 1):
+                if self.text_needle in line.lower():
+                    return line_num, line
+            return None
+
+        best = None  # (行起始偏移, 行文本)
+        file_encoding = None
+        for regex in self.patterns:
+            for match in regex.finditer(data):
+                if best is not None and match.start() >= best[0]:
+                    break
+                line_start, line_end = _line_bounds(data, match.start(), match.end())
+                line_bytes = bytes(data[line_start:line_end])
+                if line_bytes.isascii():
+                    # 纯ASCII行在所有候选编码下解码结果相同
+                    encoding = 'ascii'
+                else:
+                    # 含非ASCII字节时才确定整个文件的编码（与逐个编码尝试读取的结果一致），
+                    # 避免某编码下的字节序列恰好出现在其他编码文本中造成误报
+                    if file_encoding is None:
+                        _, file_encoding = decode_content(bytes(data))
+                    encoding = file_encoding
+                line = self._verify_line(line_bytes, encoding)
+                if line is not None:
+                    best = (line_start, line)
+                    break
+        if best is None:
+            return None
+        return _line_number(data, best[0]), best[1]
+
+    def search_file(self, file_path):
+        """
+        搜索单个文件（只读取一次）
+        :return: (行号, 行文本) 或 None
+        """
+        with open_file_bytes(file_path) as data:
+            return self.find_first(data)
+
+
+# 正则中的反向引用（组合为一个正则后组号会变化，此时不能使用组合预筛选）
+_BACKREF_PATTERN = re.compile(r'\\[1-9]|\(\?P=')
+
+
+class MultiPatternMatcher:
+    """
+    多模式匹配器：把多个搜索内容/正则表达式编译为一个组合正则（由re引擎的C实现一次扫描），
+    先定位可能命中的行，再在这些行上逐个确认具体命中了哪些模式。
+    """
+
+    def __init__(self, patterns, case_sensitive=False, use_regex=False):
+        # 去重并保持顺序
+        self.patterns = list(dict.fromkeys(p for p in patterns if p))
+        if not self.patterns:
+            raise ValueError("至少需要一个搜索内容")
+        self.case_sensitive = case_sensitive
+        self.use_regex = use_regex
+
+        flags = 0 if case_sensitive else re.IGNORECASE
+        sources = [p if use_regex else re.escape(p) for p in self.patterns]
+        # 单独编译每个模式（正则写法错误时在这里直接报错）
+        self.compiled = [re.compile(source, flags) for source in sources]
+        if any(_BACKREF_PATTERN.search(source) for source in sources) and use_regex:
+            self.combined = None
+        else:
+            self.combined = re.compile(
+                '|'.join(f'(?:{source})' for source in sources), flags | re.MULTILINE
+            )
+
+    def _match_line(self, line, remaining, results, line_num):
+        """在单行上确认命中的模式，命中后从remaining中移除"""
+        for index in list(remaining):
+            if self.compiled[index].search(line):
+                results.append((self.patterns[index], line_num, line))
+                remaining.discard(index)
+
+    def scan_text(self, text):
+        """
+        扫描整段文本（一次遍历），每个模式只报告第一条命中行
+        :return: [(模式, 行号, 行文本)]，按行号排序
+        """
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        remaining = set(range(len(self.patterns)))
+        results = []
+
+        if self.combined is None:
+            for line_num, line in enumerate(text.split('\n'), 1):
+                self._match_line(line, remaining, results, line_num)
+                if not remaining:
+                    break
+            return results
+
+        pos = 0
+        line_num = 1
+        line_pos = 0  # line_num 对应的行起始偏移
+        while remaining:
+            match = self.combined.search(text, pos)
+            if match is None:
+                break
+            line_start = text.rfind('\n', 0, match.start()) + 1
+            line_end = text.find('\n', match.start())
+            if line_end == -1:
+                line_end = len(text)
+            line_num += text.count('\n', line_pos, line_start)
+            line_pos = line_start
+            self._match_line(text[line_start:line_end], remaining, results, line_num)
+            if line_end >= len(text):
+                break
+            pos = line_end + 1
+        return results
+
+    def scan_lines(self, lines):
+        """扫描已拆分的行列表（如内容索引中的缓存）"""
+        return self.scan_text('\n'.join(lines))
+
+    def search_file(self, file_path):
+        """
+        搜索单个文件（只读取一次，所有模式在同一次扫描中完成）
+        :return: [(模式, 行号, 行文本)]
+        """
+        with open_file_bytes(file_path) as data:
+            text, _ = decode_content(bytes(data))
+        return self.scan_text(text)
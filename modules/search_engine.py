@@ -0,0 +1,366 @@
+# modules/search_engine.py
+"""
+文件内容搜索引擎（不依赖任何GUI）
+单次遍历目录树（os.scandir），把目标文件交给有界线程池扫描内容，以生成器方式逐条产出结果。
+图形界面（FileSearchThread、findfile）和命令行共用本模块。
+
+命令行用法（每行输出一个JSON对象）：
+    python -m modules.search_engine "C:\\Zeiss\\CMM_Tools\\FW_C99\\backup" "Install_version = V47.04" --names config.kmg
+    python -m modules.search_engine D:\\backup "Install_version = V47.04" "Install_typ = 101206" --workers 16 --max-depth 4
+"""
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Get the directory of the current script
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# Get the project root (parent of modules directory)
+project_root = os.path.dirname(current_dir)
+# Add project root to Python path if not already there
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from modules.search_core import ByteNeedle, MultiPatternMatcher
+
+DEFAULT_FILE_NAMES = ['config.kmg']
+DEFAULT_WORKERS = 8
+
+
+class FileContentSearch:
+    """
+    文件内容搜索任务
+    iter_results() 产出的每一项都是字典：
+        {"type": "match", "path", "line", "text", "pattern"}   匹配结果
+        {"type": "error", "path", "message"}                   读取失败
+        {"type": "progress", "discovered", "scanned"}          进度（已发现/已扫描文件数）
+    """
+
+    POLL_INTERVAL = 0.1  # 等待扫描结果时的轮询间隔（秒），期间会产出进度事件
+    HEARTBEAT_ENTRIES = 1024  # 单个目录中每遍历这么多项产出一次心跳
+
+    def __init__(self, root_dir, patterns, file_names=None, case_sensitive=False, use_regex=False,
+                 workers=DEFAULT_WORKERS, include=None, exclude=None, max_depth=None,
+                 use_index=False, index_path=None):
+        """
+        :param root_dir: 搜索根目录
+        :param patterns: 搜索内容（字符串）或多个搜索内容（列表，一次扫描报告所有命中的模式）
+        :param file_names: 目标文件名列表（不区分大小写）；与include都未指定时默认搜索config.kmg
+        :param use_regex: 是否把搜索内容作为正则表达式
+        :param workers: 扫描文件内容的线程数
+        :param include: 文件名通配符列表（如 *.kmg），匹配任一即作为目标文件
+        :param exclude: 排除的文件/目录通配符列表（匹配名称或相对路径）
+        :param max_depth: 最大遍历深度（0表示只搜索根目录本身）
+        :param use_index: 是否使用内容索引（未变化的文件直接从索引读取）
+        :param index_path: 内容索引文件路径（默认与.app_config.json同目录）
+        """
+        self.root_dir = root_dir
+        self.patterns = patterns
+        self.case_sensitive = case_sensitive
+        self.use_regex = use_regex
+        self.workers = max(1, workers)
+        self.include = [pattern.lower() for pattern in (include or [])]
+        self.exclude = [pattern.lower() for pattern in (exclude or [])]
+        self.max_depth = max_depth
+        self.use_index = use_index
+        self.index_path = index_path
+
+        if file_names is None and not self.include:
+            file_names = DEFAULT_FILE_NAMES
+        self.file_names = list(file_names or [])
+        self.target_names = {name.lower() for name in self.file_names}
+
+        if isinstance(patterns, (list, tuple)) or use_regex:
+            self.multi_matcher = MultiPatternMatcher(
+                patterns if isinstance(patterns, (list, tuple)) else [patterns], case_sensitive, use_regex
+            )
+            self.byte_needle = None
+        else:
+            self.multi_matcher = None
+            self.byte_needle = ByteNeedle(patterns, case_sensitive)
+
+        self.content_index = None
+        self.discovered = 0
+        self.scanned = 0
+        self.match_count = 0
+        self.error_count = 0
+        self.index_hits = 0
+        self.index_misses = 0
+        self.index_error = None  # 内容索引无法打开时的错误信息（此时直接读取文件）
+        self._cancel_event = threading.Event()
+
+    @property
+    def is_canceled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """取消搜索（可从其他线程调用）"""
+        self._cancel_event.set()
+
+    # -------------------------- 目录遍历 --------------------------
+    def _is_excluded(self, entry):
+        name = entry.name.lower()
+        rel_path = os.path.relpath(entry.path, self.root_dir).replace(os.sep, '/').lower()
+        return any(fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(rel_path, pattern)
+                   for pattern in self.exclude)
+
+    def _is_target(self, name):
+        name = name.lower()
+        if name in self.target_names:
+            return True
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.include)
+
+    def iter_target_files(self, heartbeat=False):
+        """
+        单次遍历目录树（基于os.scandir），逐个产出目标文件的目录项（os.DirEntry）
+        :param heartbeat: 为True时每遍历完一个目录（及大目录中每HEARTBEAT_ENTRIES项）额外产出None，
+                          目标文件稀疏时调用方也能定时处理已完成的结果和进度
+        """
+        stack = [(self.root_dir, 0)]
+        while stack:
+            if self.is_canceled:
+                return
+            current_dir, depth = stack.pop()
+            try:
+                with os.scandir(current_dir) as entries:
+                    sub_dirs = []
+                    for position, entry in enumerate(entries, 1):
+                        if heartbeat and position % self.HEARTBEAT_ENTRIES == 0:
+                            yield None
+                        try:
+                            if self.exclude and self._is_excluded(entry):
+                                continue
+                            if entry.is_dir():
+                                # 与os.walk一致：不进入符号链接目录
+                                if not entry.is_symlink() and (self.max_depth is None or depth < self.max_depth):
+                                    sub_dirs.append((entry.path, depth + 1))
+                            elif self._is_target(entry.name):
+                                yield entry
+                        except OSError:
+                            continue
+            except OSError:
+                # 与os.walk一致：忽略无法访问的目录
+                continue
+            # 逆序压栈，保证按目录顺序深度优先遍历
+            stack.extend(reversed(sub_dirs))
+            if heartbeat:
+                yield None
+
+    # -------------------------- 单文件搜索 --------------------------
+    def _find_in_lines(self, lines):
+        """在已解码的行中查找第一条匹配行"""
+        search_to_check = self.byte_needle.text_needle
+        for line_num, line in enumerate(lines, 1):
+            line_to_check = line if self.case_sensitive else line.lower()
+            if search_to_check in line_to_check:
+                return [(self.patterns, line_num, line)]
+        return []
+
+    def search_file(self, entry):
+        """
+        搜索单个文件
+        :return: (结果列表, 错误信息或None)
+        """
+        if self.is_canceled:
+            return [], None
+        file_path = entry.path
+        try:
+            if self.content_index is not None:
+                # 通过内容索引读取（文件未变化时不读取磁盘）
+                lines = self.content_index.read_lines(file_path, entry.stat())
+                if self.multi_matcher is not None:
+                    hits = self.multi_matcher.scan_lines(lines)
+                else:
+                    hits = self._find_in_lines(lines)
+            elif self.multi_matcher is not None:
+                # 多模式：读取一次文件，所有模式在同一次扫描中完成
+                hits = self.multi_matcher.search_file(file_path)
+            else:
+                # 以字节形式只读取一次文件，在各候选编码下直接匹配
+                match = self.byte_needle.search_file(file_path)
+                hits = [(self.patterns, match[0], match[1])] if match else []
+        except Exception as e:
+            return [], str(e)
+        results = [
+            {"type": "match", "path": file_path, "line": line_num, "text": line.strip(), "pattern": pattern}
+            for pattern, line_num, line in hits
+        ]
+        return results, None
+
+    # -------------------------- 搜索主流程 --------------------------
+    def _open_index(self):
+        if not self.use_index:
+            return
+        from modules.search_index import ContentIndex
+        try:
+            self.content_index = ContentIndex(self.index_path)
+        except Exception as e:
+            self.index_error = str(e)
+            self.use_index = False
+
+    def _close_index(self, completed, seen_paths):
+        if self.content_index is None:
+            return
+        try:
+            self.index_hits = self.content_index.hits
+            self.index_misses = self.content_index.misses
+            # 只在遍历覆盖了整个目录树时清理：使用通配符、排除规则或深度限制时，
+            # 未遍历到的文件仍然存在，删除其记录会导致下次完整搜索重新读取
+            if completed and not (self.include or self.exclude or self.max_depth is not None):
+                self.content_index.prune(self.root_dir, seen_paths, self.target_names)
+        finally:
+            self.content_index.close()
+            self.content_index = None
+
+    def _harvest(self, done_futures):
+        """把已完成的扫描任务转换为结果事件"""
+        for future in done_futures:
+            self.scanned += 1
+            results, error = future.result()
+            if error:
+                self.error_count += 1
+                yield {"type": "error", "path": future.file_path, "message": error}
+            for result in results:
+                self.match_count += 1
+                yield result
+
+    def _progress_event(self):
+        return {"type": "progress", "discovered": self.discovered, "scanned": self.scanned}
+
+    def iter_results(self):
+        """执行搜索并逐条产出结果事件（生成器；提前停止迭代会自动取消剩余任务）"""
+        self._open_index()
+        seen_paths = set()
+        completed = False
+        max_pending = self.workers * 4  # 限制排队任务数，避免遍历过快占用内存
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        pending = set()
+        last_heartbeat = time.monotonic()
+        try:
+            for entry in self.iter_target_files(heartbeat=True):
+                if self.is_canceled:
+                    break
+                if entry is None:
+                    # 心跳：遍历大量不含目标文件的目录时，仍按轮询间隔产出已完成的结果和进度
+                    now = time.monotonic()
+                    if now - last_heartbeat >= self.POLL_INTERVAL:
+                        last_heartbeat = now
+                        done = {future for future in pending if future.done()}
+                        pending -= done
+                        yield from self._harvest(done)
+                        yield self._progress_event()
+                    continue
+                self.discovered += 1
+                seen_paths.add(entry.path)
+                future = executor.submit(self.search_file, entry)
+                future.file_path = entry.path
+                pending.add(future)
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                else:
+                    done = {future for future in pending if future.done()}
+                    pending -= done
+                if done:
+                    yield from self._harvest(done)
+                    yield self._progress_event()
+
+            while pending and not self.is_canceled:
+                done, pending = wait(pending, timeout=self.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                yield from self._harvest(done)
+                yield self._progress_event()
+
+            completed = not self.is_canceled
+        finally:
+            if not completed:
+                self.cancel()
+                for future in pending:
+                    future.cancel()
+            executor.shutdown(wait=True)
+            self._close_index(completed, seen_paths)
+
+    def summary(self):
+        """搜索统计信息"""
+        return {
+            "type": "summary",
+            "root": self.root_dir,
+            "discovered": self.discovered,
+            "scanned": self.scanned,
+            "matches": self.match_count,
+            "errors": self.error_count,
+            "index_hits": self.index_hits,
+            "index_misses": self.index_misses,
+            "canceled": self.is_canceled,
+        }
+
+
+# -------------------------- 命令行入口 --------------------------
+def _split_globs(values):
+    """支持重复参数及逗号分隔的写法"""
+    result = []
+    for value in values or []:
+        result.extend(part.strip() for part in value.split(',') if part.strip())
+    return result
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m modules.search_engine",
+        description="在目录树中搜索文件内容，结果以JSON Lines格式输出到标准输出"
+    )
+    parser.add_argument("root", help="搜索根目录")
+    parser.add_argument("patterns", nargs="+", help="搜索内容（多个时一次扫描报告所有命中的模式）")
+    parser.add_argument("--names", action="append", help="目标文件名（可重复或用逗号分隔，默认 config.kmg）")
+    parser.add_argument("--include", action="append", help="目标文件名通配符，如 *.kmg（可重复或用逗号分隔）")
+    parser.add_argument("--exclude", action="append", help="排除的文件/目录通配符（可重复或用逗号分隔）")
+    parser.add_argument("--max-depth", type=int, default=None, help="最大遍历深度（0表示只搜索根目录）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="扫描线程数（默认8）")
+    parser.add_argument("--regex", action="store_true", help="把搜索内容作为正则表达式")
+    parser.add_argument("--case-sensitive", action="store_true", help="区分大小写")
+    parser.add_argument("--index", action="store_true", help="使用内容索引（未变化的文件直接从索引读取）")
+    parser.add_argument("--index-path", default=None, help="内容索引文件路径")
+    parser.add_argument("--progress", action="store_true", help="同时输出进度事件")
+    return parser
+
+
+def main(argv=None):
+    """命令行入口：找到匹配返回0，未找到返回1，参数或目录错误返回2"""
+    args = build_arg_parser().parse_args(argv)
+    if not os.path.isdir(args.root):
+        print(json.dumps({"type": "error", "path": args.root, "message": "目录不存在"}, ensure_ascii=False))
+        return 2
+
+    patterns = args.patterns[0] if len(args.patterns) == 1 else args.patterns
+    try:
+        search = FileContentSearch(
+            args.root, patterns,
+            file_names=_split_globs(args.names) or None,
+            case_sensitive=args.case_sensitive,
+            use_regex=args.regex,
+            workers=args.workers,
+            include=_split_globs(args.include),
+            exclude=_split_globs(args.exclude),
+            max_depth=args.max_depth,
+            use_index=args.index,
+            index_path=args.index_path,
+        )
+    except Exception as e:
+        print(json.dumps({"type": "error", "path": None, "message": f"搜索参数无效: {e}"}, ensure_ascii=False))
+        return 2
+
+    try:
+        for event in search.iter_results():
+            if event["type"] == "progress" and not args.progress:
+                continue
+            print(json.dumps(event, ensure_ascii=False), flush=event["type"] != "match")
+    except KeyboardInterrupt:
+        search.cancel()
+    print(json.dumps(search.summary(), ensure_ascii=False), flush=True)
+    return 0 if search.match_count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
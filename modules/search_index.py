@@ -0,0 +1,126 @@
+# modules/search_index.py
+"""
+文件内容索引
+以 (路径, 文件大小, 修改时间) 为键，把解码后的文件内容压缩保存到SQLite中。
+重复搜索时只重新读取发生变化的文件，其余文件直接从索引中读取。
+"""
+import os
+import sqlite3
+import threading
+import zlib
+
+from .config import SEARCH_INDEX_PATH
+from .search_core import decode_content, split_lines
+
+
+class ContentIndex:
+    """基于SQLite的文件内容索引（线程安全，可在搜索线程池中共享）"""
+
+    FLUSH_THRESHOLD = 200  # 累积多少条新记录后批量写入
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or SEARCH_INDEX_PATH
+        self._lock = threading.Lock()
+        self._pending = []
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_content ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " encoding TEXT NOT NULL,"
+            " content BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def read_lines(self, file_path, stat_result=None):
+        """
+        获取文件的所有行：索引命中时直接返回缓存内容，否则读取文件并更新索引
+        :param file_path: 文件路径
+        :param stat_result: 文件的stat结果（可传入os.DirEntry.stat()以避免重复stat）
+        :return: 行列表（不含换行符）
+        """
+        if stat_result is None:
+            stat_result = os.stat(file_path)
+        size = stat_result.st_size
+        mtime_ns = stat_result.st_mtime_ns
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM file_content WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (file_path, size, mtime_ns)
+            ).fetchone()
+            if row is not None:
+                self.hits += 1
+        if row is not None:
+            return split_lines(zlib.decompress(row[0]).decode('utf-8'))
+
+        # 索引未命中：只读取一次文件，在内存中解码
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        text, encoding = decode_content(raw)
+        self._store(file_path, size, mtime_ns, encoding, text)
+        return split_lines(text)
+
+    def _store(self, file_path, size, mtime_ns, encoding, text):
+        """缓存一条待写入记录，达到阈值后批量写入"""
+        blob = zlib.compress(text.encode('utf-8'))
+        with self._lock:
+            self.misses += 1
+            self._pending.append((file_path, size, mtime_ns, encoding, blob))
+            if len(self._pending) >= self.FLUSH_THRESHOLD:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO file_content (path, size, mtime_ns, encoding, content) VALUES (?, ?, ?, ?, ?)",
+            self._pending
+        )
+        self._conn.commit()
+        self._pending = []
+
+    def flush(self):
+        """把缓存的新记录写入数据库"""
+        with self._lock:
+            self._flush_locked()
+
+    def prune(self, root_dir, seen_paths, target_names=None):
+        """
+        删除root_dir下本次搜索未再出现的文件记录（文件已删除或改名）
+        :param target_names: 本次搜索的文件名集合（小写），只清理这些文件名的记录
+        """
+        prefix = os.path.join(root_dir, '')
+        with self._lock:
+            self._flush_locked()
+            stale = [
+                (path,) for (path,) in self._conn.execute("SELECT path FROM file_content")
+                if path.startswith(prefix) and path not in seen_paths
+                and (target_names is None or os.path.basename(path).lower() in target_names)
+            ]
+            if stale:
+                self._conn.executemany("DELETE FROM file_content WHERE path = ?", stale)
+                self._conn.commit()
+        return len(stale)
+
+    def close(self):
+        """写入剩余记录并关闭数据库"""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._flush_locked()
+            finally:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,124 @@
+# modules/signature_cache.py
+"""
+Outlook签名缓存
+保存处理后的签名HTML（已修正图片路径），并记录签名文件夹和所有候选签名文件的大小、修改时间。
+签名未变化时直接使用缓存，不再扫描签名文件夹、读取文件，也不再打开临时邮件探测签名。
+"""
+import glob
+import json
+import os
+
+from .config import SIGNATURE_CACHE_PATH
+
+SIGNATURE_CACHE_VERSION = 2
+
+
+def signature_dir():
+    """Outlook签名文件夹（%APPDATA%\\Microsoft\\Signatures），无APPDATA时返回空字符串"""
+    appdata = os.getenv('APPDATA', '')
+    return os.path.join(appdata, 'Microsoft', 'Signatures') if appdata else ""
+
+
+def _stat_key(path):
+    """文件或文件夹的 [大小, 修改时间]，不存在时为None"""
+    if not path:
+        return None
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return [stat_result.st_size, stat_result.st_mtime_ns]
+
+
+def _signature_candidates(signature_path):
+    """候选签名文件（.htm优先，没有时取.html）"""
+    if not signature_path:
+        return []
+    return glob.glob(os.path.join(signature_path, '*.htm')) or glob.glob(os.path.join(signature_path, '*.html'))
+
+
+def _candidates_state(signature_path):
+    """所有候选签名文件的 {路径: [大小, 修改时间]}"""
+    return {path: _stat_key(path) for path in _signature_candidates(signature_path)}
+
+
+def find_latest_signature(signature_path):
+    """签名文件夹中最新的签名文件（.htm优先），没有时返回None"""
+    html_files = _signature_candidates(signature_path)
+    if not html_files:
+        return None
+    return max(html_files, key=os.path.getmtime)
+
+
+def read_signature_file(signature_file):
+    """读取签名文件并把图片的相对路径改为绝对路径"""
+    with open(signature_file, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    # 修正签名中的图片路径
+    signature_path = os.path.dirname(signature_file)
+    base_name = os.path.splitext(os.path.basename(signature_file))[0]
+    image_folder = os.path.join(signature_path, base_name)
+    if os.path.exists(image_folder):
+        content = content.replace(f'"{base_name}/', f'"{image_folder}/')
+        content = content.replace(f"'{base_name}/", f"'{image_folder}/")
+    return content
+
+
+class SignatureCache:
+    """
+    签名缓存（单条记录）
+    entry: {"dir", "dir_state", "file", "candidates", "source", "html"}
+    source 为 file（来自签名文件）或 outlook（通过临时邮件探测，file为None）
+    candidates 记录所有候选签名文件的大小、修改时间：新增、删除或编辑任一签名（包括使另一个签名成为最新的编辑）都会使缓存失效；
+    签名文件夹的修改时间另外覆盖了只有子文件夹（签名图片）变化的情况。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or SIGNATURE_CACHE_PATH
+        self.entry = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # 缓存损坏时重新获取签名
+            return
+        if data.get("version") == SIGNATURE_CACHE_VERSION:
+            self.entry = data.get("entry")
+
+    def get(self, signature_path):
+        """
+        :return: (签名HTML, 来源)；缓存不存在或签名已变化时返回 (None, None)
+        """
+        entry = self.entry
+        if not entry or entry.get("dir") != signature_path:
+            return None, None
+        if entry.get("dir_state") != _stat_key(signature_path):
+            return None, None
+        # 只比较大小和修改时间（不读取文件），候选文件任一变化都可能改变最新的签名
+        if entry.get("candidates") != _candidates_state(signature_path):
+            return None, None
+        return entry.get("html", ""), entry.get("source")
+
+    def put(self, signature_path, signature_file, html, source):
+        """记录当前签名并写入缓存文件"""
+        self.entry = {
+            "dir": signature_path,
+            "dir_state": _stat_key(signature_path),
+            "file": signature_file,
+            "candidates": _candidates_state(signature_path),
+            "source": source,
+            "html": html,
+        }
+        self.save()
+
+    def save(self):
+        """写入缓存（先写临时文件再替换，避免中途中断留下损坏的缓存）"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": SIGNATURE_CACHE_VERSION, "entry": self.entry}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,154 @@
+# utils/datasource_cache.py
+"""
+datasource工作簿缓存（进程内共享）
+每个工作簿只用openpyxl只读模式完整读取一次，所有工作表的单元格值保存为紧凑的行元组；
+之后每次使用前只检查文件大小和修改时间，文件未变化时直接返回缓存，变化后自动重新读取。
+MEMO生成、Outlook邮件、收件人读取和 file_utils 中的读取函数共用同一份缓存。
+"""
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Lazy import for openpyxl
+def get_openpyxl():
+    import openpyxl
+    return openpyxl
+
+
+class CachedSheet:
+    """单个工作表的值：rows 为行元组组成的元组（与 iter_rows(values_only=True) 的结果相同）"""
+    __slots__ = ("title", "rows", "max_column")
+
+    def __init__(self, title, rows, max_column):
+        self.title = title
+        self.rows = rows
+        self.max_column = max_column
+
+
+class CachedWorkbook:
+    """一个工作簿在某个文件版本（大小、修改时间）下的全部工作表数据"""
+
+    def __init__(self, path, size, mtime_ns, sheets, active_title):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sheets = sheets  # {工作表名称: CachedSheet}，保持工作簿中的顺序
+        self.active_title = active_title
+        # 由本版本数据计算出的结果（如列式记录），文件变化后随缓存一起丢弃
+        self.derived = {}
+
+    @property
+    def sheetnames(self):
+        return list(self.sheets)
+
+    def sheet(self, sheet_name=None):
+        """按名称取工作表，名称为None时取活动工作表（与openpyxl一致，名称不存在时抛出KeyError）"""
+        title = sheet_name or self.active_title
+        try:
+            return self.sheets[title]
+        except KeyError:
+            raise KeyError(f"Worksheet {title} does not exist.") from None
+
+    def matches(self, stat_result):
+        return self.size == stat_result.st_size and self.mtime_ns == stat_result.st_mtime_ns
+
+
+_cache = {}
+_lock = threading.Lock()  # 只保护_cache和_load_locks的读写，读取文件状态和工作簿时不持有
+_load_locks = {}  # {缓存键: 锁}，同一文件同时只读取一次，不同文件及revalidate互不阻塞
+
+
+def _cache_key(file_path):
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def _load_lock(key):
+    with _lock:
+        return _load_locks.setdefault(key, threading.Lock())
+
+
+def _cached(key, stat_result):
+    """缓存中与文件状态一致的工作簿，没有时返回None"""
+    with _lock:
+        cached = _cache.get(key)
+    return cached if cached is not None and cached.matches(stat_result) else None
+
+
+def _load(path, stat_result):
+    """只读模式读取整个工作簿（一次打开，依次读取所有工作表）"""
+    openpyxl = get_openpyxl()
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        sheets = {}
+        for worksheet in workbook.worksheets:
+            rows = tuple(worksheet.iter_rows(values_only=True))
+            # 只读模式下max_column来自工作表的维度记录，缺失时按实际读取的行计算
+            max_column = worksheet.max_column or max((len(row) for row in rows), default=0)
+            sheets[worksheet.title] = CachedSheet(worksheet.title, rows, max_column)
+        active_title = workbook.active.title if workbook.active is not None else next(iter(sheets), None)
+    finally:
+        workbook.close()
+    return CachedWorkbook(path, stat_result.st_size, stat_result.st_mtime_ns, sheets, active_title)
+
+
+def get_workbook(file_path):
+    """
+    取工作簿数据：文件大小和修改时间与缓存一致时直接返回缓存，否则重新读取
+    :raises FileNotFoundError: 文件不存在
+    """
+    key = _cache_key(file_path)
+    cached = _cached(key, os.stat(file_path))
+    if cached is not None:
+        return cached
+    with _load_lock(key):
+        # 等待期间其他线程可能已读取了同一版本
+        stat_result = os.stat(file_path)
+        cached = _cached(key, stat_result)
+        if cached is not None:
+            return cached
+        workbook = _load(file_path, stat_result)
+        with _lock:
+            _cache[key] = workbook
+    logger.info(f"已读取工作簿 {os.path.basename(file_path)}：{len(workbook.sheets)}个工作表")
+    return workbook
+
+
+def get_sheet(file_path, sheet_name=None):
+    """取单个工作表（CachedSheet），sheet_name为None时取活动工作表"""
+    return get_workbook(file_path).sheet(sheet_name)
+
+
+def get_sheet_rows(file_path, sheet_name=None):
+    """取工作表的所有行（行元组组成的元组，调用方不应修改）"""
+    return get_sheet(file_path, sheet_name).rows
+
+
+def revalidate(file_path):
+    """
+    检查缓存是否仍对应当前文件（只读取文件状态，不打开工作簿）；文件已变化或已删除时丢弃缓存，下次使用时重新读取
+    :return: True 缓存仍然有效；False 尚未缓存或缓存已丢弃
+    """
+    key = _cache_key(file_path)
+    with _lock:
+        cached = _cache.get(key)
+    if cached is None:
+        return False
+    try:
+        if cached.matches(os.stat(file_path)):
+            return True
+    except OSError:
+        pass
+    with _lock:
+        # 只丢弃检查的这一版本（期间其他线程可能已放入新读取的版本）
+        if _cache.get(key) is cached:
+            del _cache[key]
+    return False
+
+
+def clear():
+    """清空所有缓存"""
+    with _lock:
+        _cache.clear()
@@ -1,12 +1,15 @@
 import os
+import sys
 import glob
 from typing import Tuple, Optional, List, Any
 import logging
 
-# Lazy import for openpyxl
-def get_openpyxl():
-    import openpyxl
-    return openpyxl
+# Add project root to Python path if not already there（直接运行本文件测试时需要）
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils import datasource_cache
 
 # 设置日志
 logger = logging.getLogger(__name__)
@@ -66,20 +69,11 @@ def read_excel_data(file_path: str, sheet_name: Optional[str] = None, header_row
         List of lists representing Excel data, or None if error
     """
     try:
-        # Load workbook
-        openpyxl = get_openpyxl()
-        workbook = openpyxl.load_workbook(file_path, read_only=True)
-
-        # Get sheet
-        if sheet_name:
-            sheet = workbook[sheet_name]
-        else:
-            sheet = workbook.active
+        # 从共享缓存读取（文件未修改时不重新打开工作簿）
+        rows = datasource_cache.get_sheet_rows(file_path, sheet_name)
 
-        # Read data
-        data = []
-        for row in sheet.iter_rows(values_only=True):
-            data.append(list(row))
+        # Read data（返回新的列表，调用方修改不影响缓存）
+        data = [list(row) for row in rows]
 
         # Handle header row if specified
         if header_row is not None and header_row > 0 and len(data) > header_row - 1:
@@ -103,9 +97,6 @@ def read_excel_data(file_path: str, sheet_name: Optional[str] = None, header_row
         error_msg = f"读取Excel文件失败: {str(e)}"
         logger.error(error_msg)
         return None
-    finally:
-        if 'workbook' in locals():
-            workbook.close()
 
 
 def validate_excel_file(file_path: str) -> Tuple[bool, str]:
@@ -127,13 +118,8 @@ def validate_excel_file(file_path: str) -> Tuple[bool, str]:
         if not file_path.lower().endswith(('.xlsx', '.xls')):
             return False, "文件不是有效的Excel格式"
 
-        # 尝试读取文件前几行
-        openpyxl = get_openpyxl()
-        workbook = openpyxl.load_workbook(file_path, read_only=True)
-        sheet = workbook.active
-        # Try to read first row
-        next(sheet.iter_rows(max_row=1))
-        workbook.close()
+        # 尝试读取文件（结果写入共享缓存，后续读取不再重新打开）
+        datasource_cache.get_sheet(file_path)
 
         return True, "文件有效"
 
@@ -152,13 +138,8 @@ def get_sheet_names(file_path: str) -> Optional[list]:
         工作表名称列表或None（如果出错）
     """
     try:
-        # 使用openpyxl获取工作表名称
-        openpyxl = get_openpyxl()
-        workbook = openpyxl.load_workbook(file_path, read_only=True)
-        sheet_names = workbook.sheetnames
-        workbook.close()
-
-        return sheet_names
+        # 从共享缓存获取工作表名称
+        return datasource_cache.get_workbook(file_path).sheetnames
 
     except Exception as e:
         logger.error(f"获取工作表名称失败: {str(e)}")
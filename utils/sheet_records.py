@@ -0,0 +1,141 @@
+# utils/sheet_records.py
+"""
+Sheet1列式记录
+一次遍历行元组计算空行掩码，只为需要的列生成文本数组；
+MEMO生成和Outlook邮件共用同一份记录（按工作簿版本缓存，文件未修改时不重新计算）。
+
+    batch = load_record_batch(excel_path, (1, 2, 4))
+    batch.nonblank            # 整行非空的掩码
+    batch.stripped(1)         # B列去除首尾空白后的文本
+    batch.complete((1, 2, 4)) # 指定列均非空的掩码
+"""
+import os
+import re
+import sys
+
+# Add project root to Python path if not already there
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils import datasource_cache
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+# Lazy import for numpy
+def get_numpy():
+    import numpy
+    return numpy
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and value.strip() == '')
+
+
+def _to_text(value):
+    return "" if value is None else str(value)
+
+
+def _collapse_whitespace(text):
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def _object_array(values):
+    """Python字符串列表转换为对象数组（不复制字符串，tolist()直接返回原字符串）"""
+    array = get_numpy().empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+class RecordBatch:
+    """
+    工作表中若干列的列式数据
+    row_numbers: Excel行号（从1开始）
+    nonblank: 整行是否有非空单元格
+    text(列序号): 单元格文本（空单元格为空字符串），元素为str的对象数组
+    行掩码和按行选取用numpy完成；文本处理直接对Python字符串逐列进行，避免numpy定长字符串的转换开销
+    """
+
+    def __init__(self, row_numbers, nonblank, texts):
+        self.row_numbers = row_numbers
+        self.nonblank = nonblank
+        self._texts = texts  # {列序号: 文本数组}
+        self._stripped = {}
+
+    def __len__(self):
+        return len(self.row_numbers)
+
+    @property
+    def columns(self):
+        return tuple(self._texts)
+
+    def text(self, column):
+        return self._texts[column]
+
+    def stripped(self, column):
+        """去除首尾空白后的文本"""
+        result = self._stripped.get(column)
+        if result is None:
+            result = self._stripped[column] = _object_array([text.strip() for text in self._texts[column]])
+        return result
+
+    def last_segment(self, column, separator):
+        """分隔符后的最后一段（去除首尾空白），没有分隔符时为整个文本"""
+        return _object_array([text.rpartition(separator)[2].strip() for text in self._texts[column]])
+
+    def collapsed(self, column):
+        """连续空白合并为一个空格并去除首尾空白"""
+        return _object_array([_collapse_whitespace(text) for text in self._texts[column]])
+
+    def complete(self, columns):
+        """指定列去除空白后均非空的掩码"""
+        np = get_numpy()
+        mask = np.ones(len(self), dtype=bool)
+        for column in columns:
+            mask &= np.fromiter(map(bool, self.stripped(column)), dtype=bool, count=len(self))
+        return mask
+
+    def take(self, mask):
+        """按掩码（或行下标）取出部分行，返回新的RecordBatch"""
+        return RecordBatch(
+            self.row_numbers[mask],
+            self.nonblank[mask],
+            {column: text[mask] for column, text in self._texts.items()},
+        )
+
+
+def _has_value(row):
+    """行中是否有非空单元格（遇到第一个非空单元格即返回）"""
+    for value in row:
+        if not _is_blank(value):
+            return True
+    return False
+
+
+def _build_batch(rows, columns):
+    np = get_numpy()
+    count = len(rows)
+    # 一次遍历行元组得到空行掩码（大部分行在第一个单元格处即可判断）
+    nonblank = np.fromiter(map(_has_value, rows), dtype=bool, count=count)
+
+    # 只为需要的列生成文本（行元组长度不足时为空字符串）
+    texts = {}
+    for column in columns:
+        texts[column] = _object_array([_to_text(row[column]) if column < len(row) else "" for row in rows])
+    return RecordBatch(np.arange(1, count + 1), nonblank, texts)
+
+
+def load_record_batch(file_path, columns, sheet_name='Sheet1'):
+    """
+    读取工作表中指定列（从0开始的列序号）的列式记录
+    结果按工作簿版本缓存：文件未修改时同样的列直接返回已计算的记录
+    """
+    columns = tuple(sorted(set(columns)))
+    workbook = datasource_cache.get_workbook(file_path)
+    key = ("records", sheet_name, columns)
+    batch = workbook.derived.get(key)
+    if batch is None:
+        batch = _build_batch(workbook.sheet(sheet_name).rows, columns)
+        workbook.derived[key] = batch
+    return batch